@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from puzzle import AStar
+from typing import Dict, Optional
+
+from puzzle import AStar, AnytimeAStar, ExternalAStar, IDAStar, ParallelAStar
+from puzzle.checkpoint import Checkpointer
+from puzzle.instrumentation import SearchInstrumentation
 
 from .environment import PacmanEnvironment, PacmanProblem
 from .heuristics import (
@@ -8,6 +12,8 @@ from .heuristics import (
     PieAwareHeuristic,
     ExactDistanceHeuristic,
     ExactMSTHeuristic,
+    FoodTourHeuristic,
+    GhostDistanceHeuristic,
     CombinedHeuristic,
 )
 
@@ -30,6 +36,11 @@ def _select_heuristic(name: str, environment: PacmanEnvironment):
         "h1": ExactMSTHeuristic,
         "exact-dist": ExactDistanceHeuristic,
         "distance": ExactDistanceHeuristic,
+        "tour": FoodTourHeuristic,
+        "food-tour": FoodTourHeuristic,
+        "held-karp": FoodTourHeuristic,
+        "ghost": GhostDistanceHeuristic,
+        "space-time": GhostDistanceHeuristic,
         "combo": CombinedHeuristic,
         "combined": CombinedHeuristic,
         "max": CombinedHeuristic,
@@ -49,25 +60,123 @@ def _select_auto(environment: PacmanEnvironment):
     ghost_count = len(layout.ghost_starts)
 
     # Tiêu chí đơn giản:
-    # - Layout rộng hoặc có nhiều food/ghost -> dùng Combined 
+    # - Ít food và không có pie -> Held-Karp cho giá trị chính xác theo metric có tường.
+    # - Layout rộng, có ghost (Combined có thành phần space-time) hoặc nhiều food -> dùng Combined 
     # - Layout nhỏ/vừa -> ExactMST đủ nhanh và nhẹ.
+    if pie_count == 0 and ghost_count == 0 and food_count <= FoodTourHeuristic.MAX_FOOD:
+        return FoodTourHeuristic(environment)
     if (
         open_cells > 200
         or food_count >= 12
-        or ghost_count > 1
+        or ghost_count > 0
         or pie_count > 1
     ):
         return CombinedHeuristic(environment)
     return ExactMSTHeuristic(environment)
 
 
-def run_auto_mode(layout_lines, heuristic: str = "auto"):
-    """Chạy chế độ tự động: trả về (path, cost, expanded, frontier_max)."""
-    environment = PacmanEnvironment(layout_lines)
-    problem = PacmanProblem(environment)
+def run_auto_mode(
+    layout_lines,
+    heuristic: str = "auto",
+    frontier: str = "bucket",
+    algorithm: str = "astar",
+    table_size: int = 100_000,
+    time_limit: Optional[float] = None,
+    max_expansions: Optional[int] = None,
+    workers: int = 4,
+    stats: Optional[Dict[str, object]] = None,
+    instrumentation: Optional[SearchInstrumentation] = None,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_every: Optional[int] = None,
+    checkpoint_interval: Optional[float] = None,
+    resume_from: Optional[str] = None,
+    closed_ram_mb: float = 256,
+    lazy_heuristic: bool = False,
+    macros: bool = False,
+    cache_dir: Optional[str] = None,
+    tie_breaking: str = "low-h",
+    dominance: bool = True,
+):
+    """Chạy chế độ tự động: trả về (path, cost, expanded, frontier_max).
+
+    Chi phí bước của Pacman luôn là 1 nên mặc định dùng bucket queue.
+    `algorithm="ida"` dùng IDA* (bộ nhớ theo độ sâu) với bảng chuyển vị `table_size`.
+    Khi có `time_limit` (giây) hoặc `max_expansions`, A* chuyển sang chế độ
+    anytime (`AnytimeAStar`) và trả lời giải tốt nhất trong ngân sách.
+    `algorithm="parallel"` dùng HDA* (`ParallelAStar`) với `workers` tiến trình.
+    Nếu truyền dict `stats`, nó được cập nhật bằng `solver.stats` (vd: `bound`)
+    và số lần trúng/trượt của `mst_cache` nếu heuristic có cache MST.
+    `instrumentation` được chuyển cho `AStar` để đo thời gian theo pha.
+    `checkpoint_path` bật snapshot định kỳ (mỗi `checkpoint_every` nút hoặc
+    `checkpoint_interval` giây); `resume_from` tiếp tục từ một snapshot.
+    `algorithm="external"` giữ tập đóng trong tối đa `closed_ram_mb` MB RAM,
+    phần vượt quá tràn ra đĩa (`ExternalAStar`).
+    `lazy_heuristic` bật đánh giá heuristic lười của `AStar` (phần đắt của
+    `CombinedHeuristic` chỉ tính khi nút sắp được mở rộng).
+    `macros` bật bước macro qua hành lang và cắt nhánh cụt của `PacmanProblem`
+    (layout không có ghost); `path` trả về đã được trải thành các bước đơn.
+    Môi trường được nạp từ artifact layout trong `cache_dir` (biên dịch ở lần
+    đầu, xem `PacmanEnvironment.compiled`); `cache_dir=None` dựng lại từ đầu.
+    `tie_breaking` là chính sách tie-break của `AStar`/`AnytimeAStar`; Pacman
+    mặc định `low-h` (engine chung mặc định `none`).
+    `dominance` bật cắt tỉa trội theo `pie_timer` của `AStar` (engine chung mặc định tắt).
+    """
+    environment = PacmanEnvironment.compiled(layout_lines, cache_dir)
+    problem = PacmanProblem(environment, macros=macros)
     heuristic_obj = _select_heuristic(heuristic, environment)
-    solver = AStar(problem, heuristic_obj)
-    return solver.search()
+    if algorithm == "astar" and (time_limit is not None or max_expansions is not None):
+        algorithm = "anytime"
+
+    if algorithm == "ida":
+        solver = IDAStar(problem, heuristic_obj, table_size=table_size)
+    elif algorithm == "anytime":
+        solver = AnytimeAStar(
+            problem,
+            heuristic_obj,
+            frontier=frontier,
+            time_limit=time_limit,
+            max_expansions=max_expansions,
+            tie_breaking=tie_breaking,
+        )
+    elif algorithm == "parallel":
+        solver = ParallelAStar(problem, heuristic_obj, workers=workers, frontier=frontier)
+    elif algorithm == "external":
+        solver = ExternalAStar(
+            problem,
+            heuristic_obj,
+            frontier=frontier,
+            closed_ram_bytes=int(closed_ram_mb * 1024 * 1024),
+        )
+    elif algorithm == "astar":
+        checkpoint = None
+        if checkpoint_path is not None:
+            checkpoint = Checkpointer(checkpoint_path, every=checkpoint_every, interval=checkpoint_interval)
+        solver = AStar(
+            problem,
+            heuristic_obj,
+            frontier=frontier,
+            instrumentation=instrumentation,
+            checkpoint=checkpoint,
+            resume_from=resume_from,
+            lazy_heuristic=lazy_heuristic,
+            tie_breaking=tie_breaking,
+            dominance=dominance,
+        )
+    else:
+        raise ValueError(f"Thuật toán '{algorithm}' không được hỗ trợ.")
+
+    result = solver.search()
+    if result[0] is not None and problem.corridors is not None:
+        result = (problem.expand_path(result[0]),) + tuple(result[1:])
+    if stats is not None:
+        stats.update(solver.stats)
+        mst_cache = getattr(heuristic_obj, "mst_cache", None)
+        if mst_cache is not None:
+            stats["mst_cache"] = mst_cache.stats()
+        component_stats = getattr(heuristic_obj, "component_stats", None)
+        if component_stats is not None:
+            stats["heuristic_components"] = component_stats()
+    return result
 
 
 __all__ = ["run_auto_mode"]
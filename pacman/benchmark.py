@@ -0,0 +1,183 @@
+"""Benchmark cho các engine tìm kiếm trên các layout đi kèm.
+
+Chạy bằng `python -m pacman.benchmark <tên-benchmark> [tuỳ chọn]`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+from typing import Callable, List, Sequence, Tuple
+
+from puzzle import AStar, Node
+from puzzle.nodestore import NO_PARENT, NodeStore
+from puzzle.parallel import ParallelAStar
+from puzzle.tiebreak import TIE_BREAKERS
+
+from .auto import _select_heuristic
+from .environment import PacmanEnvironment, PacmanProblem
+
+
+LAYOUT_DIR = Path(__file__).resolve().parent / "layouts"
+PUZZLE_DIR = Path(__file__).resolve().parent.parent / "puzzle"
+DEFAULT_LAYOUTS = ["small_basic", "maze"]
+
+
+def _load_layout(name: str) -> List[str]:
+    path = Path(name)
+    if not path.exists():
+        path = LAYOUT_DIR / f"{name}.txt"
+    with path.open("r", encoding="utf-8") as file:
+        return [line.rstrip("\n") for line in file]
+
+
+def _build(name: str, heuristic: str):
+    environment = PacmanEnvironment(_load_layout(name))
+    return PacmanProblem(environment), _select_heuristic(heuristic, environment)
+
+
+def _timed(run: Callable[[], tuple]):
+    start = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start
+
+
+def bench_parallel(layouts: Sequence[str], workers: Sequence[int], heuristic: str) -> None:
+    """Tăng tốc của `ParallelAStar` theo số worker so với `AStar` tuần tự."""
+    print(f"{'layout':<18}{'engine':<12}{'cost':>6}{'expanded':>10}{'time(s)':>10}{'speedup':>9}")
+    for name in layouts:
+        problem, h = _build(name, heuristic)
+        (_, cost, expanded, _), base = _timed(lambda: AStar(problem, h, frontier="bucket", tie_breaking="low-h", dominance=True).search())
+        print(f"{name:<18}{'sequential':<12}{cost:>6}{expanded:>10}{base:>10.2f}{1.0:>9.2f}")
+
+        for count in workers:
+            problem, h = _build(name, heuristic)
+            solver = ParallelAStar(problem, h, workers=count, frontier="bucket")
+            (_, cost, expanded, _), elapsed = _timed(solver.search)
+            label = f"hda*x{count}"
+            print(f"{name:<18}{label:<12}{cost:>6}{expanded:>10}{elapsed:>10.2f}{base / elapsed:>9.2f}")
+
+
+def _generate_nodes(name: str, limit: int) -> List[Tuple[object, int, object, int]]:
+    """Sinh tối đa `limit` nút (trạng thái khác nhau) theo BFS: (state, cha, action, g)."""
+    environment = PacmanEnvironment(_load_layout(name))
+    problem = PacmanProblem(environment)
+    records = [(problem.initial_state, NO_PARENT, None, 0)]
+    seen = {problem.initial_state}
+    queue = deque([0])
+    while queue and len(records) < limit:
+        index = queue.popleft()
+        state, _, _, g = records[index]
+        for next_state, action, cost in problem.get_successors(state):
+            if next_state in seen:
+                continue
+            seen.add(next_state)
+            records.append((next_state, index, action, g + cost))
+            queue.append(len(records) - 1)
+            if len(records) >= limit:
+                break
+    return records
+
+
+def bench_memory(layouts: Sequence[str], limit: int) -> None:
+    """Số byte mỗi nút: `Node` + dict lookup/explored (cũ) so với `NodeStore`."""
+    print(f"{'layout':<18}{'nodes':>8}{'Node B/node':>14}{'store B/node':>14}{'ratio':>8}")
+    for name in layouts:
+        records = _generate_nodes(name, limit)
+
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        nodes: List[Node] = []
+        lookup = {}
+        explored = {}
+        for state, parent, action, g in records:
+            node = Node(state, nodes[parent] if parent != NO_PARENT else None, action, g, 0)
+            nodes.append(node)
+            lookup[state] = node
+            explored[state] = g
+        legacy = tracemalloc.get_traced_memory()[0] - base
+        del nodes, lookup, explored
+
+        base = tracemalloc.get_traced_memory()[0]
+        store = NodeStore()
+        for state, parent, action, g in records:
+            store.add(state, g, 0, parent, action)
+        compact = tracemalloc.get_traced_memory()[0] - base
+        tracemalloc.stop()
+        del store
+
+        count = len(records)
+        print(f"{name:<18}{count:>8}{legacy / count:>14.1f}{compact / count:>14.1f}{legacy / compact:>8.2f}")
+
+
+def bench_tiebreak(layouts: Sequence[str], heuristic: str, frontier: str, puzzle_cases: bool) -> None:
+    """Số nút mở rộng theo chính sách tie-break trên layout Pacman và test case 8-puzzle."""
+    policies = list(TIE_BREAKERS)
+    print(f"{'instance':<22}" + "".join(f"{policy:>10}" for policy in policies))
+    for name in layouts:
+        row = []
+        for policy in policies:
+            problem, h = _build(name, heuristic)
+            _, _, expanded, _ = AStar(problem, h, frontier=frontier, tie_breaking=policy, dominance=True).search()
+            row.append(expanded)
+        print(f"{name:<22}" + "".join(f"{count:>10}" for count in row))
+
+    if not puzzle_cases:
+        return
+    # App 8-puzzle dùng import tuyệt đối (`models`, `algorithms`) tính từ thư mục puzzle/.
+    sys.path.insert(0, str(PUZZLE_DIR))
+    from algorithms import AStar as PuzzleAStar, ManhattanDistanceHeuristic, Problem as PuzzleProblem
+    from models import State
+    from tests.test_cases import TestCases
+
+    groups = {
+        "easy": TestCases.get_easy_cases(),
+        "medium": TestCases.get_medium_cases(),
+        "hard": TestCases.get_hard_cases(),
+    }
+    for group, boards in groups.items():
+        totals = [0] * len(policies)
+        for board in boards:
+            problem = PuzzleProblem(State(board))
+            h = ManhattanDistanceHeuristic(problem.goal_states)
+            for index, policy in enumerate(policies):
+                _, _, stats = PuzzleAStar(problem, h, tie_breaking=policy).search()
+                totals[index] += stats["nodes_expanded"]
+        label = f"8-puzzle {group} ({len(boards)})"
+        print(f"{label:<22}" + "".join(f"{count:>10}" for count in totals))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pacman search benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    parallel = subparsers.add_parser("parallel", help="Tăng tốc HDA* theo số worker.")
+    parallel.add_argument("--layouts", nargs="+", default=DEFAULT_LAYOUTS)
+    parallel.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, 8])
+    parallel.add_argument("--heuristic", default="auto")
+
+    memory = subparsers.add_parser("memory", help="Bộ nhớ mỗi nút: Node so với NodeStore.")
+    memory.add_argument("--layouts", nargs="+", default=DEFAULT_LAYOUTS)
+    memory.add_argument("--nodes", type=int, default=100_000)
+
+    tiebreak = subparsers.add_parser("tiebreak", help="Số nút mở rộng theo chính sách tie-break.")
+    tiebreak.add_argument("--layouts", nargs="+", default=DEFAULT_LAYOUTS)
+    tiebreak.add_argument("--heuristic", default="auto")
+    tiebreak.add_argument("--frontier", default="bucket")
+    tiebreak.add_argument("--no-puzzle", dest="puzzle_cases", action="store_false")
+
+    args = parser.parse_args()
+    if args.benchmark == "parallel":
+        bench_parallel(args.layouts, args.workers, args.heuristic)
+    elif args.benchmark == "memory":
+        bench_memory(args.layouts, args.nodes)
+    elif args.benchmark == "tiebreak":
+        bench_tiebreak(args.layouts, args.heuristic, args.frontier, args.puzzle_cases)
+
+
+if __name__ == "__main__":
+    main()
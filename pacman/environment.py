@@ -1,7 +1,17 @@
 from __future__ import annotations
 
+import hashlib
+import mmap
+import os
+import pickle
+import random
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
 from dataclasses import dataclass
-from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+from typing import BinaryIO, Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
 
 from puzzle import Action, Problem
 
@@ -17,17 +27,27 @@ class GhostState:
     direction: int  # +1: sang phải, -1: sang trái
 
 
-@dataclass(frozen=True)
-class PacmanState:
-    """Trạng thái đầy đủ của Pacman."""
+class PacmanState(NamedTuple):
+    """Trạng thái đầy đủ của Pacman, mã hoá gọn.
+
+    - `food`, `pies`: bitmask trên chỉ số ô `row * width + col` của layout hiện tại.
+    - `phase`: chỉ số trong `GhostSchedule` — chỉ phần thời gian ảnh hưởng tới
+      tương lai (vị trí ma, thời điểm quay); số bước thật chính là chi phí đường đi.
+      Ma chuyển động độc lập với Pacman nên không nằm trong trạng thái.
+    - `zobrist`: hash Zobrist 64 bit, cập nhật tăng dần trong hàm successor và
+      được dùng trực tiếp làm `__hash__`.
+    """
 
     pacman_pos: Point
-    food: FrozenSet[Point]
-    pies: FrozenSet[Point]
-    ghosts: Tuple[GhostState, ...]
+    food: int
+    pies: int
     pie_timer: int
-    time_step: int
+    phase: int
     layout_index: int
+    zobrist: int
+
+    def __hash__(self) -> int:
+        return self.zobrist
 
 
 @dataclass(frozen=True)
@@ -57,12 +77,58 @@ class PacmanLayout:
                 return name
         return None
 
+    def index(self, pos: Point) -> int:
+        """Chỉ số ô dùng cho bitmask của trạng thái."""
+        return pos[0] * self.width + pos[1]
+
+    def point(self, index: int) -> Point:
+        return divmod(index, self.width)
+
+    def mask(self, points: Iterable[Point]) -> int:
+        mask = 0
+        for pos in points:
+            mask |= 1 << (pos[0] * self.width + pos[1])
+        return mask
+
+    def cells(self, mask: int) -> List[int]:
+        """Chỉ số các ô có bit bật trong `mask`."""
+        result: List[int] = []
+        while mask:
+            low = mask & -mask
+            result.append(low.bit_length() - 1)
+            mask ^= low
+        return result
+
+    def points(self, mask: int) -> List[Point]:
+        """Các ô có bit bật trong `mask`."""
+        width = self.width
+        result: List[Point] = []
+        while mask:
+            low = mask & -mask
+            result.append(divmod(low.bit_length() - 1, width))
+            mask ^= low
+        return result
+
 
 def _rotate_point(point: Point, width: int, height: int) -> Point:
     r, c = point
     return c, height - 1 - r
 
 
+def _move_ghost(ghost: GhostState, layout: PacmanLayout) -> GhostState:
+    row, col = ghost.position
+    next_col = col + ghost.direction
+    next_pos = (row, next_col)
+    if not layout.in_bounds(next_pos) or layout.is_wall(next_pos):
+        ghost = GhostState(ghost.position, -ghost.direction)
+        next_pos = (row, col + ghost.direction)
+
+    if not layout.in_bounds(next_pos) or layout.is_wall(next_pos):
+        return GhostState(ghost.position, ghost.direction)
+
+    return GhostState(next_pos, ghost.direction)
+
+
 def _rotate_layout(layout: PacmanLayout) -> PacmanLayout:
     """Sinh layout sau khi quay 90 độ theo chiều kim đồng hồ."""
     new_width, new_height = layout.height, layout.width
@@ -81,29 +147,954 @@ def _rotate_layout(layout: PacmanLayout) -> PacmanLayout:
     )
 
 
+MOVE_NAMES: Tuple[str, ...] = ("Up", "Down", "Left", "Right")
+MOVE_STEPS: Tuple[Point, ...] = ((-1, 0), (1, 0), (0, -1), (0, 1))
+TELEPORT = len(MOVE_NAMES)
+
+
+@dataclass(frozen=True)
+class LayoutGraph:
+    """Đồ thị đã biên dịch của một layout: ô đánh số `row * width + col`.
+
+    Kề dạng CSR: các cạnh của ô `u` là `targets[offsets[u]:offsets[u + 1]]`,
+    theo thứ tự Up, Down, Left, Right rồi teleport (nếu `u` là góc).
+
+    - `walled_*`: chỉ đi vào ô không phải tường; teleport tới mọi góc khác (như
+      `PacmanProblem.get_successors`: Pacman được dịch chuyển lên góc là tường
+      rồi bước ra ô trống bên cạnh).
+    - `free_*`: bỏ qua tường (cận dưới khi có pie); teleport tới mọi góc khác.
+      `free_kind[e]` là chỉ số trong `MOVE_NAMES` hoặc `TELEPORT`, `free_split[u]`
+      là vị trí cạnh teleport đầu tiên của hàng `u`.
+    - `wall[c]`: 1 nếu ô `c` là tường; `corner_mask`: bitmask các góc teleport.
+    """
+
+    width: int
+    height: int
+    point: Tuple[Point, ...]
+    wall: bytes
+    corners: Tuple[int, ...]
+    corner_mask: int
+    goal: int
+    walled_offsets: array
+    walled_targets: array
+    free_offsets: array
+    free_targets: array
+    free_kind: array
+    free_split: array
+
+    @property
+    def cells(self) -> int:
+        return self.width * self.height
+
+    def bfs(self, source: int, free: bool = False, unreachable: int = -1) -> array:
+        """Khoảng cách BFS từ `source` tới mọi ô (`unreachable` nếu không tới được)."""
+        if free:
+            offsets, targets = self.free_offsets, self.free_targets
+        else:
+            offsets, targets = self.walled_offsets, self.walled_targets
+        dist = array("i", [-1]) * self.cells
+        dist[source] = 0
+        frontier = [source]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for u in frontier:
+                for e in range(offsets[u], offsets[u + 1]):
+                    v = targets[e]
+                    if dist[v] < 0:
+                        dist[v] = depth
+                        next_frontier.append(v)
+            frontier = next_frontier
+        if unreachable != -1:
+            for cell, value in enumerate(dist):
+                if value < 0:
+                    dist[cell] = unreachable
+        return dist
+
+
+def compile_layout(layout: PacmanLayout) -> LayoutGraph:
+    """Biên dịch `PacmanLayout` thành `LayoutGraph` (một lần cho mỗi layout quay)."""
+    width, height = layout.width, layout.height
+    wall = bytearray(width * height)
+    for pos in layout.walls:
+        wall[layout.index(pos)] = 1
+    corners = tuple(layout.index(pos) for pos in layout.teleports.values())
+
+    walled_offsets, walled_targets = array("I", [0]), array("I")
+    free_offsets, free_targets = array("I", [0]), array("I")
+    free_kind, free_split = array("B"), array("I")
+    for u in range(width * height):
+        r, c = divmod(u, width)
+        for kind, (dr, dc) in enumerate(MOVE_STEPS):
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < height and 0 <= nc < width:
+                v = nr * width + nc
+                free_targets.append(v)
+                free_kind.append(kind)
+                if not wall[v]:
+                    walled_targets.append(v)
+        free_split.append(len(free_targets))
+        if u in corners:
+            for v in corners:
+                if v != u:
+                    free_targets.append(v)
+                    free_kind.append(TELEPORT)
+                    walled_targets.append(v)
+        walled_offsets.append(len(walled_targets))
+        free_offsets.append(len(free_targets))
+
+    corner_mask = 0
+    for v in corners:
+        corner_mask |= 1 << v
+    return LayoutGraph(
+        width=width,
+        height=height,
+        point=tuple(divmod(u, width) for u in range(width * height)),
+        wall=bytes(wall),
+        corners=corners,
+        corner_mask=corner_mask,
+        goal=layout.index(layout.exit_gate),
+        walled_offsets=walled_offsets,
+        walled_targets=walled_targets,
+        free_offsets=free_offsets,
+        free_targets=free_targets,
+        free_kind=free_kind,
+        free_split=free_split,
+    )
+
+
+@dataclass(frozen=True)
+class CorridorGraph:
+    """Đồ thị hành lang/ngã rẽ của layout 0 (chỉ số ô chuẩn, dùng cho cả bốn layout quay).
+
+    Chỉ xét lúc không có pie (`pie_timer == 0`). Ô "dừng" là food/pie ban đầu,
+    exit và góc teleport.
+
+    - `dead[c]`: 1 nếu ô thuộc nhánh cụt không chứa ô dừng (lấp dần từ lá):
+      đi vào đó khi không có pie chỉ tốn bước rồi quay ra.
+    - `paths[u]`: các lối ra của ô `u`, mỗi lối là dãy ô đi thẳng từ ô kề `v`
+      qua các ô hành lang (bậc 2, không phải ô dừng) tới ô không phải hành lang
+      đầu tiên; vòng quay về `u` bị bỏ. Từ ô sống chỉ đi sang ô kề không cụt;
+      từ tường (pie vừa hết) hoặc ô cụt thì mọi ô kề đều được, vào giữa hành
+      lang thì có cả hai hướng.
+    """
+
+    dead: bytes
+    paths: Tuple[Tuple[Tuple[int, ...], ...], ...]
+
+
+def compile_corridors(graph: LayoutGraph, stops: int) -> CorridorGraph:
+    """Dựng `CorridorGraph` từ hàng `free_*` của `graph` theo đúng luật bước của
+    `PacmanProblem` khi không có pie: đi vào ô không phải tường, teleport tới mọi
+    góc. `stops` là bitmask ô dừng."""
+    cells = graph.cells
+    wall = graph.wall
+    offsets, targets, split = graph.free_offsets, graph.free_targets, graph.free_split
+    neighbours = [
+        [v for v in targets[offsets[u]:split[u]] if not wall[v]] + list(targets[split[u]:offsets[u + 1]])
+        for u in range(cells)
+    ]
+
+    dead = bytearray(cells)
+    degree = [0 if wall[u] else len(vs) for u, vs in enumerate(neighbours)]
+    leaves = [u for u in range(cells) if not wall[u] and degree[u] <= 1 and not stops >> u & 1]
+    while leaves:
+        u = leaves.pop()
+        if dead[u]:
+            continue
+        dead[u] = 1
+        for v in neighbours[u]:
+            if not dead[v]:
+                degree[v] -= 1
+                if degree[v] <= 1 and not stops >> v & 1:
+                    leaves.append(v)
+
+    live = [[v for v in vs if not dead[v]] for vs in neighbours]
+    corridor = [not wall[u] and not dead[u] and not stops >> u & 1 and len(live[u]) == 2 for u in range(cells)]
+
+    def follow(origin: int, previous: int, first: int) -> Optional[Tuple[int, ...]]:
+        run, current = [first], first
+        while corridor[current]:
+            a, b = live[current]
+            previous, current = current, b if a == previous else a
+            if current == origin or current == first:
+                return None
+            run.append(current)
+        return tuple(run)
+
+    paths: List[Tuple[Tuple[int, ...], ...]] = []
+    for u in range(cells):
+        runs = []
+        if wall[u] or dead[u]:
+            for v in neighbours[u]:
+                entries = live[v] if corridor[v] else [u]
+                runs.extend(follow(u, w, v) or (v,) for w in entries)
+        else:
+            runs.extend(follow(u, u, v) for v in live[u])
+        paths.append(tuple(run for run in runs if run is not None))
+    return CorridorGraph(dead=bytes(dead), paths=tuple(paths))
+
+
+@dataclass(frozen=True)
+class GhostSchedule:
+    """Lịch chạy của ma tính trước, chỉ số theo `phase`.
+
+    Ma không phụ thuộc Pacman: cấu hình ma tại bước `t` chỉ phụ thuộc `t`.
+    Mô phỏng từ `t = 0` cho tới khi cặp (`t mod 4·ROTATION_PERIOD`, cấu hình ma)
+    lặp lại; `phase` chạy `0 … len-1` rồi quay về `loop_start`.
+
+    - `ghosts[phase]`: vị trí/hướng từng ma trong toạ độ của `layout_index[phase]`.
+    - `blocked[phase]`: các ô Pacman không được bước tới từ `phase` (ma hiện tại
+      và ma sau khi đi một bước, trước khi quay), để va chạm chỉ là một lookup.
+    - `next_phase[phase]`: phase kế tiếp.
+    """
+
+    ghosts: Tuple[Tuple[GhostState, ...], ...]
+    blocked: Tuple[FrozenSet[Point], ...]
+    layout_index: Tuple[int, ...]
+    next_phase: Tuple[int, ...]
+    loop_start: int
+
+    def __len__(self) -> int:
+        return len(self.ghosts)
+
+
+class RotationTables:
+    """Bảng hoán vị chỉ số ô giữa bốn layout quay, dùng chung cho môi trường và heuristic.
+
+    - `cell[i][c]`: chỉ số trong layout `(i + 1) % 4` của ô `c` thuộc layout `i`.
+    - `to_canonical[i][c]`, `from_canonical[i][c]`: đổi giữa layout `i` và layout 0.
+    - `rotate_mask(i, mask)`: quay bitmask food/pie bằng bảng tra theo từng byte,
+      chỉ dựng cho các byte chứa ô food/pie của layout `i` (bit khác luôn tắt);
+      `canonical_mask(i, mask)` tương tự nhưng đổi thẳng về layout 0.
+    """
+
+    def __init__(self, layouts: Sequence["PacmanLayout"]):
+        cells = layouts[0].width * layouts[0].height
+        self.cell: List[array] = []
+        for layout in layouts:
+            width, height = layout.width, layout.height
+            next_width = height  # layout sau khi quay có width = height cũ
+            perm = array("I", bytes(4 * cells))
+            for index in range(cells):
+                r, c = divmod(index, width)
+                nr, nc = _rotate_point((r, c), width, height)
+                perm[index] = nr * next_width + nc
+            self.cell.append(perm)
+
+        self.to_canonical: List[array] = [array("I", range(cells))]
+        for i in range(3):
+            previous, perm = self.to_canonical[i], self.cell[i]
+            canonical = array("I", bytes(4 * cells))
+            for index in range(cells):
+                canonical[perm[index]] = previous[index]
+            self.to_canonical.append(canonical)
+        self.from_canonical: List[array] = []
+        for canonical in self.to_canonical:
+            inverse = array("I", bytes(4 * cells))
+            for index, target in enumerate(canonical):
+                inverse[target] = index
+            self.from_canonical.append(inverse)
+
+        self._chunks: List[List[Tuple[int, List[int]]]] = []
+        self._canonical_chunks: List[List[Tuple[int, List[int]]]] = []
+        for i, layout in enumerate(layouts):
+            items = sorted(layout.index(p) for p in layout.food | layout.pies)
+            self._chunks.append(self._byte_tables(items, self.cell[i]))
+            self._canonical_chunks.append(self._byte_tables(items, self.to_canonical[i]))
+
+    @staticmethod
+    def _byte_tables(items: List[int], perm: array) -> List[Tuple[int, List[int]]]:
+        """Bảng tra 256 phần tử cho mỗi byte của bitmask có chứa ô trong `items`.
+
+        Byte cuối có thể vượt quá số ô; các bit đó không bao giờ bật nên được bỏ qua.
+        """
+        cells = len(perm)
+        chunks = []
+        for byte in sorted({index >> 3 for index in items}):
+            table = [0] * 256
+            for value in range(1, 256):
+                low = value & -value
+                index = (byte << 3) + low.bit_length() - 1
+                table[value] = table[value ^ low] | (1 << perm[index] if index < cells else 0)
+            chunks.append((byte << 3, table))
+        return chunks
+
+    def rotate_mask(self, layout_index: int, mask: int) -> int:
+        return self._apply(self._chunks[layout_index], mask)
+
+    def canonical_mask(self, layout_index: int, mask: int) -> int:
+        """Bitmask food/pie của layout `layout_index` đổi sang chỉ số ô của layout 0."""
+        return self._apply(self._canonical_chunks[layout_index], mask)
+
+    @staticmethod
+    def _apply(chunks: List[Tuple[int, List[int]]], mask: int) -> int:
+        result = 0
+        for shift, table in chunks:
+            byte = (mask >> shift) & 0xFF
+            if byte:
+                result |= table[byte]
+        return result
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pacman")
+
+_MATRIX_VERSION = 2
+_ARTIFACT_VERSION = 3
+_CACHE_HEADER = struct.Struct("<4sII")  # magic, version, kích thước
+
+
+def load_cached_array(
+    path: str, magic: bytes, version: int, size: int, length: int, offset: int = 0
+) -> Optional[memoryview]:
+    """Mở file cache `uint16` bằng `mmap` (không sao chép).
+
+    Trả `None` nếu file thiếu hoặc header (`magic`, `version`, `size`) hay độ
+    dài (`length` phần tử) không khớp — khi đó nơi gọi tính lại và ghi đè.
+    `offset > 0`: bản ghi (header + mảng) nằm giữa một file lớn hơn (artifact layout).
+    """
+    try:
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    start = offset + _CACHE_HEADER.size
+    end = start + 2 * length
+    if (
+        len(mapped) < end
+        or (not offset and len(mapped) != end)
+        or _CACHE_HEADER.unpack_from(mapped, offset) != (magic, version, size)
+    ):
+        mapped.close()
+        return None
+    return memoryview(mapped)[start:end].cast("H")
+
+
+def _artifact_base(meta_size: int) -> int:
+    """Vị trí bản ghi bảng đầu tiên trong artifact layout (sau header và meta, căn 8 byte)."""
+    offset = _CACHE_HEADER.size + meta_size
+    return offset + -offset % 8
+
+
+def _write_atomic(path: str, write: Callable[[BinaryIO], None]) -> bool:
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            write(file)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)  # ghi nguyên tử: tiến trình khác không thấy file dở
+    except OSError:
+        return False
+    return True
+
+
+def store_cached_array(path: str, magic: bytes, version: int, size: int, values: array) -> bool:
+    """Ghi `values` kèm header ra `path` một cách nguyên tử; `False` nếu không ghi được."""
+
+    def write(file: BinaryIO) -> None:
+        file.write(_CACHE_HEADER.pack(magic, version, size))
+        values.tofile(file)
+
+    return _write_atomic(path, write)
+
+
+def _all_pairs(graph: LayoutGraph, free: bool) -> array:
+    """Ma trận khoảng cách `uint16` V×V (`matrix[s * V + c]`), 0 nếu không tới được.
+
+    BFS đa nguồn theo từng lớp, song song theo bit: `frontier[c]` là bitmask các
+    nguồn có `c` ở lớp hiện tại, lớp kế tiếp của `v` là OR các `frontier` của
+    đỉnh kề vào `v` trừ đi các nguồn đã tới `v` — mỗi lớp chỉ vài phép toán số
+    nguyên lớn trên mỗi cạnh thay vì một BFS cho mỗi nguồn.
+    """
+    cells = graph.cells
+    if free:
+        offsets, targets = graph.free_offsets, graph.free_targets
+    else:
+        offsets, targets = graph.walled_offsets, graph.walled_targets
+    predecessors: List[List[int]] = [[] for _ in range(cells)]
+    for u in range(cells):
+        for e in range(offsets[u], offsets[u + 1]):
+            predecessors[targets[e]].append(u)
+
+    matrix = array("H", bytes(2 * cells * cells))
+    reached = [1 << c for c in range(cells)]
+    frontier: Dict[int, int] = dict(enumerate(reached))
+    depth = 0
+    while frontier:
+        depth += 1
+        candidates = {v for u in frontier for v in targets[offsets[u]:offsets[u + 1]]}
+        next_frontier: Dict[int, int] = {}
+        for v in candidates:
+            sources = 0
+            for u in predecessors[v]:
+                sources |= frontier.get(u, 0)
+            sources &= ~reached[v]
+            if not sources:
+                continue
+            reached[v] |= sources
+            next_frontier[v] = sources
+            while sources:
+                low = sources & -sources
+                matrix[(low.bit_length() - 1) * cells + v] = depth
+                sources ^= low
+        frontier = next_frontier
+    return matrix
+
+
+def _wall_passing(graph: LayoutGraph, previous: Sequence[int]) -> array:
+    """Ma trận `d_k` từ `d_{k-1}` (`previous`): `k` bước đầu được xuyên tường.
+
+    Các bước xuyên tường luôn là tiền tố của đường đi (timer chỉ giảm), nên
+    `d_k(s, ·) = min(d_{k-1}(s, ·), 1 + d_{k-1}(u, ·))` với `u` kề `s` trong đồ
+    thị `free_*`. Mỗi hàng là một lần `map(min, ...)` trên các hàng có sẵn.
+    """
+    cells = graph.cells
+    unreachable = 0xFFFF
+    rows: List[List[int]] = []
+    for s in range(cells):
+        row = [d or unreachable for d in previous[s * cells:(s + 1) * cells]]
+        row[s] = 0
+        rows.append(row)
+    stepped = [[d + 1 for d in row] for row in rows]
+
+    offsets, targets = graph.free_offsets, graph.free_targets
+    matrix = array("H")
+    for s in range(cells):
+        neighbours = [stepped[u] for u in targets[offsets[s]:offsets[s + 1]]]
+        best = list(map(min, rows[s], *neighbours)) if neighbours else rows[s]
+        matrix.extend(d if d < unreachable else 0 for d in best)
+    return matrix
+
+
+class DistanceTable:
+    """Khoảng cách BFS tính trên layout 0, phục vụ cả bốn layout quay.
+
+    Mỗi phép quay là một đẳng cấu của đồ thị layout 0 (góc teleport vẫn là góc),
+    nên chỉ cần một ma trận `uint16` V×V theo chỉ số ô chuẩn; truy vấn ở
+    `layout_index` bất kỳ đổi chỉ số ô qua `rotation.to_canonical`. Ô không tới
+    được có khoảng cách 0 (vẫn là cận dưới).
+
+    `wall_steps = k > 0`: metric có tường nhưng `k` bước đầu được xuyên tường
+    (Pacman còn `pie_timer = k`), dựng từ bảng `k - 1` (`previous`).
+
+    Nếu có `cache_dir`, ma trận được ghi ra file khoá theo hash nội dung đồ thị
+    và mở lại bằng `mmap` (không sao chép) ở các lần chạy/tiến trình sau.
+    `artifact = (path, offset)`: ma trận là một bản ghi trong artifact layout
+    (xem `PacmanEnvironment.compiled`), được ưu tiên hơn `cache_dir`.
+    """
+
+    def __init__(
+        self,
+        graph: LayoutGraph,
+        rotation: RotationTables,
+        free: bool = False,
+        cache_dir: Optional[str] = None,
+        wall_steps: int = 0,
+        previous: Optional["DistanceTable"] = None,
+        artifact: Optional[Tuple[str, int]] = None,
+    ):
+        self.graph = graph
+        self.free = free
+        self.wall_steps = 0 if free else wall_steps
+        self.rotation = rotation
+        self.to_canonical = rotation.to_canonical
+        self.goal = graph.goal
+        self.path: Optional[str] = None
+        self.offset = 0
+        if artifact is not None:
+            self.path, self.offset = artifact
+        elif cache_dir is not None:
+            self.path = os.path.join(cache_dir, f"distances-{self._content_key()}.bin")
+        self._open(previous)
+
+    def _content_key(self) -> str:
+        graph = self.graph
+        digest = hashlib.sha256()
+        digest.update(repr((_MATRIX_VERSION, sys.byteorder, self.free, self.wall_steps, graph.width, graph.height, graph.corners)).encode())
+        digest.update(graph.wall)
+        return digest.hexdigest()[:20]
+
+    def _open(self, previous: Optional["DistanceTable"] = None) -> None:
+        matrix = self._load() if self.path is not None else None
+        if matrix is None:
+            matrix = self._build(previous)
+            if self.offset:
+                self.path = None  # artifact hỏng hoặc đã bị xoá: giữ ma trận trong RAM
+            elif self.path is not None:
+                self._store(matrix)
+                mapped = self._load() if self.path is not None else None
+                if mapped is not None:
+                    matrix = mapped
+        cells = self.graph.cells
+        self.matrix = matrix
+        view = memoryview(matrix)
+        self._rows = [view[c * cells:(c + 1) * cells] for c in range(cells)]
+
+    def _build(self, previous: Optional["DistanceTable"]) -> array:
+        if not self.wall_steps:
+            return _all_pairs(self.graph, self.free)
+        if previous is not None and previous.wall_steps == self.wall_steps - 1:
+            return _wall_passing(self.graph, previous.matrix)
+        matrix = _all_pairs(self.graph, False)
+        for _ in range(self.wall_steps):
+            matrix = _wall_passing(self.graph, matrix)
+        return matrix
+
+    def _load(self) -> Optional[memoryview]:
+        cells = self.graph.cells
+        return load_cached_array(self.path, b"PDST", _MATRIX_VERSION, cells, cells * cells, self.offset)
+
+    def _store(self, matrix: array) -> None:
+        if not store_cached_array(self.path, b"PDST", _MATRIX_VERSION, self.graph.cells, matrix):
+            self.path = None  # không ghi được cache thì giữ ma trận trong RAM
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_rows"]
+        if self.path is not None:
+            del state["matrix"]  # tiến trình con mở lại file bằng mmap
+        else:
+            state["matrix"] = array("H", self.matrix)
+        return state
+
+    def __setstate__(self, state) -> None:
+        self.__dict__.update(state)
+        if "matrix" in state:
+            cells = self.graph.cells
+            view = memoryview(self.matrix)
+            self._rows = [view[c * cells:(c + 1) * cells] for c in range(cells)]
+        else:
+            self._open()
+
+    def row(self, cell: int) -> memoryview:
+        """Khoảng cách từ ô chuẩn `cell` tới mọi ô chuẩn."""
+        return self._rows[cell]
+
+    def canonical(self, layout_index: int, cell: int) -> int:
+        return self.to_canonical[layout_index][cell]
+
+    def cells(self, layout_index: int, mask: int) -> List[int]:
+        """Chỉ số ô chuẩn của các bit bật trong `mask` (bitmask của layout `layout_index`)."""
+        canonical = self.to_canonical[layout_index]
+        result: List[int] = []
+        while mask:
+            low = mask & -mask
+            result.append(canonical[low.bit_length() - 1])
+            mask ^= low
+        return result
+
+    def canonical_mask(self, layout_index: int, mask: int) -> int:
+        return self.rotation.canonical_mask(layout_index, mask)
+
+    def distance(self, layout_index: int, a: int, b: int) -> int:
+        canonical = self.to_canonical[layout_index]
+        return self._rows[canonical[a]][canonical[b]]
+
+
+_GHOST_VERSION = 1
+
+
+def _space_time_distances(
+    graphs: Sequence[LayoutGraph],
+    rotation: RotationTables,
+    schedule: GhostSchedule,
+    through_walls: bool,
+) -> array:
+    """BFS ngược từ exit trên đồ thị (ô, phase): `dist[phase * V + cell]`.
+
+    Cạnh xuôi giống hệt `PacmanProblem.get_successors` (bỏ qua food/pie):
+    không bước vào ô `schedule.blocked[phase]`, tường chỉ đi qua được nếu
+    `through_walls`, ô đích được quay sang layout của phase kế tiếp.
+    """
+    cells = graphs[0].cells
+    phases = len(schedule)
+    predecessors: List[List[int]] = [[] for _ in range(phases * cells)]
+    for phase in range(phases):
+        layout_index = schedule.layout_index[phase]
+        graph = graphs[layout_index]
+        blocked = schedule.blocked[phase]
+        point, wall = graph.point, graph.wall
+        targets = graph.free_targets
+        next_phase = schedule.next_phase[phase]
+        next_base = next_phase * cells
+        turn = rotation.cell[layout_index] if schedule.layout_index[next_phase] != layout_index else None
+        for cell in range(cells):
+            source = phase * cells + cell
+            moves = [
+                v
+                for v in targets[graph.free_offsets[cell]:graph.free_split[cell]]
+                if (through_walls or not wall[v]) and point[v] not in blocked
+            ]
+            if (through_walls or not wall[cell]) and point[cell] not in blocked:
+                moves.append(cell)
+            moves.extend(v for v in targets[graph.free_split[cell]:graph.free_offsets[cell + 1]] if point[v] not in blocked)
+            for v in moves:
+                predecessors[next_base + (turn[v] if turn is not None else v)].append(source)
+
+    dist = array("H", [GhostDistanceTable.UNREACHABLE]) * (phases * cells)
+    frontier = [phase * cells + graphs[schedule.layout_index[phase]].goal for phase in range(phases)]
+    for node in frontier:
+        dist[node] = 0
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for node in frontier:
+            for source in predecessors[node]:
+                if dist[source] == GhostDistanceTable.UNREACHABLE:
+                    dist[source] = depth
+                    next_frontier.append(source)
+        frontier = next_frontier
+    return dist
+
+
+class GhostDistanceTable:
+    """Khoảng cách tới exit trên đồ thị (ô, phase), tôn trọng lịch di chuyển của ma.
+
+    `distance(phase, cell)` với `cell` là chỉ số ô trong layout của phase đó
+    (`schedule.layout_index[phase]`, cũng là `state.layout_index`); `UNREACHABLE`
+    nếu không có cách nào tới exit. `free=True` cho phép xuyên tường ở mọi bước
+    (cận dưới khi còn pie). Mảng `uint16` P×V được cache như `DistanceTable`
+    (kể cả `artifact = (path, offset)`).
+    """
+
+    UNREACHABLE = 0xFFFF
+
+    def __init__(
+        self,
+        graphs: Sequence[LayoutGraph],
+        rotation: RotationTables,
+        schedule: GhostSchedule,
+        free: bool = False,
+        cache_dir: Optional[str] = None,
+        artifact: Optional[Tuple[str, int]] = None,
+    ):
+        self.graphs = graphs
+        self.rotation = rotation
+        self.schedule = schedule
+        self.free = free
+        self.cells = graphs[0].cells
+        self.path: Optional[str] = None
+        self.offset = 0
+        if artifact is not None:
+            self.path, self.offset = artifact
+        elif cache_dir is not None:
+            self.path = os.path.join(cache_dir, f"ghosts-{self._content_key()}.bin")
+        self._open()
+
+    def _content_key(self) -> str:
+        graph, schedule = self.graphs[0], self.schedule
+        digest = hashlib.sha256()
+        digest.update(repr((_GHOST_VERSION, sys.byteorder, self.free, graph.width, graph.height, graph.corners, graph.goal)).encode())
+        digest.update(graph.wall)
+        digest.update(repr((schedule.layout_index, schedule.next_phase)).encode())
+        digest.update(repr([sorted(blocked) for blocked in schedule.blocked]).encode())
+        return digest.hexdigest()[:20]
+
+    def _open(self) -> None:
+        size = len(self.schedule) * self.cells
+        table = None
+        if self.path is not None:
+            table = load_cached_array(self.path, b"PGST", _GHOST_VERSION, self.cells, size, self.offset)
+        if table is None:
+            table = _space_time_distances(self.graphs, self.rotation, self.schedule, self.free)
+            if self.offset:
+                self.path = None
+            elif self.path is not None:
+                if store_cached_array(self.path, b"PGST", _GHOST_VERSION, self.cells, table):
+                    table = load_cached_array(self.path, b"PGST", _GHOST_VERSION, self.cells, size) or table
+                else:
+                    self.path = None
+        self.table = table
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.path is not None:
+            del state["table"]  # tiến trình con mở lại file bằng mmap
+        else:
+            state["table"] = array("H", self.table)
+        return state
+
+    def __setstate__(self, state) -> None:
+        self.__dict__.update(state)
+        if "table" not in state:
+            self._open()
+
+    def distance(self, phase: int, cell: int) -> int:
+        return self.table[phase * self.cells + cell]
+
+
+class ZobristKeys:
+    """Bảng khoá Zobrist 64 bit, sinh xác định từ `seed` (ổn định giữa các tiến trình).
+
+    Khoá ô được sinh theo toạ độ layout 0 rồi ánh xạ sang từng layout qua
+    `to_canonical`, nên quay trạng thái chỉ đổi khoá `layout`; các bảng
+    `pacman`/`food`/`pies` có một danh sách cho mỗi `layout_index`.
+    """
+
+    def __init__(self, rotation: RotationTables, timer_values: int, phases: int, seed: int = 0x5EED):
+        rng = random.Random(seed)
+        keys = lambda n: [rng.getrandbits(64) for _ in range(n)]
+        cells = len(rotation.to_canonical[0])
+        per_layout = lambda table: [[table[c] for c in canonical] for canonical in rotation.to_canonical]
+        self.pacman = per_layout(keys(cells))
+        self.food = per_layout(keys(cells))
+        self.pies = per_layout(keys(cells))
+        self.pie_timer = keys(timer_values)
+        self.phase = keys(phases)
+        self.layout = keys(4)
+
+
 class PacmanEnvironment:
     """Quản lý layout và trạng thái khởi tạo của Pacman."""
 
     PIE_DURATION = 5
     ROTATION_PERIOD = 30
 
-    def __init__(self, layout_lines: Sequence[str]):
+    def __init__(self, layout_lines: Sequence[str], cache_dir: Optional[str] = None):
         base_layout = self._parse_layout(layout_lines)
         self.layouts: List[PacmanLayout] = [base_layout]
         for _ in range(3):
             self.layouts.append(_rotate_layout(self.layouts[-1]))
 
+        self.graphs: List[LayoutGraph] = [compile_layout(layout) for layout in self.layouts]
+        self.rotation = RotationTables(self.layouts)
+        self.schedule = self._build_schedule()
+        self.artifact_path: Optional[str] = None
+        self._segments: Dict[Tuple[str, bool, int], int] = {}
+        self._setup(cache_dir)
+
+    @classmethod
+    def compiled(cls, layout_lines: Sequence[str], cache_dir: Optional[str] = None) -> "PacmanEnvironment":
+        """Môi trường dựng từ artifact layout đã biên dịch (tạo ở lần đầu).
+
+        Artifact `layout-<hash>.bin` trong `cache_dir`, khoá theo hash nội dung
+        layout (đổi layout là đổi file), chứa layout đã parse, bốn layout quay,
+        `graphs`, `rotation`, `schedule` (pickle) cùng các ma trận
+        `timer_distances()`, `distances(free=True)` và `ghost_distances()` nếu
+        có ma (bản ghi `uint16` mở bằng `mmap`, không sao chép). `cache_dir=None`
+        thì dựng thẳng như constructor.
+        """
+        if cache_dir is None:
+            return cls(layout_lines, None)
+        digest = hashlib.sha256(repr((_ARTIFACT_VERSION, sys.byteorder, cls.PIE_DURATION, cls.ROTATION_PERIOD)).encode())
+        digest.update("\n".join(layout_lines).encode())
+        path = os.path.join(cache_dir, f"layout-{digest.hexdigest()[:20]}.bin")
+        environment = cls._load_artifact(path, cache_dir)
+        if environment is None:
+            built = cls(layout_lines, None)
+            if built._store_artifact(path):
+                environment = cls._load_artifact(path, cache_dir)
+            if environment is None:
+                built.cache_dir = cache_dir
+                environment = built
+        return environment
+
+    @classmethod
+    def _load_artifact(cls, path: str, cache_dir: Optional[str]) -> Optional["PacmanEnvironment"]:
+        try:
+            with open(path, "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        with mapped:
+            if len(mapped) < _CACHE_HEADER.size:
+                return None
+            magic, version, size = _CACHE_HEADER.unpack_from(mapped)
+            if (magic, version) != (b"PLAY", _ARTIFACT_VERSION) or len(mapped) < _CACHE_HEADER.size + size:
+                return None
+            try:
+                core, segments, end, checksum = pickle.loads(mapped[_CACHE_HEADER.size:_CACHE_HEADER.size + size])
+            except Exception:
+                return None  # artifact hỏng: dựng lại
+            base = _artifact_base(size)
+            if len(mapped) != base + end:
+                return None
+            with memoryview(mapped) as view, view[base:] as region:
+                if zlib.crc32(region) != checksum:
+                    return None  # vùng bảng bị ghi đè/hỏng: dựng lại
+        environment = cls.__new__(cls)
+        environment.layouts, environment.graphs, environment.rotation, environment.schedule = core
+        environment.artifact_path = path
+        environment._segments = {key: base + offset for key, offset in segments.items()}
+        environment._setup(cache_dir)
+        return environment
+
+    def _store_artifact(self, path: str) -> bool:
+        """Tính mọi bảng dùng chung rồi ghi artifact layout nguyên tử."""
+        tables: List[Tuple[Tuple[str, bool, int], bytes, array]] = []
+        for t, table in enumerate(self.timer_distances()):
+            tables.append((("distances", False, t), b"PDST", table.matrix))
+        tables.append((("distances", True, 0), b"PDST", self.distances(free=True).matrix))
+        if self.layouts[0].ghost_starts:
+            for free in (False, True):
+                tables.append((("ghosts", free, 0), b"PGST", self.ghost_distances(free).table))
+
+        segments: Dict[Tuple[str, bool, int], int] = {}
+        offset = 0  # tính từ đầu vùng bảng (ngay sau meta, căn 8 byte)
+        for key, _, values in tables:
+            segments[key] = offset
+            offset += _CACHE_HEADER.size + 2 * len(values)
+            offset += -offset % 8
+
+        def region() -> Iterable[bytes]:
+            """Các khối byte của vùng bảng, theo đúng thứ tự ghi (kể cả đệm)."""
+            position = 0
+            for key, magic, values in tables:
+                yield bytes(segments[key] - position)
+                version = _MATRIX_VERSION if magic == b"PDST" else _GHOST_VERSION
+                yield _CACHE_HEADER.pack(magic, version, self.graphs[0].cells)
+                yield memoryview(values).cast("B")
+                position = segments[key] + _CACHE_HEADER.size + 2 * len(values)
+            yield bytes(offset - position)
+
+        checksum = 0
+        for chunk in region():
+            checksum = zlib.crc32(chunk, checksum)
+        core = (self.layouts, self.graphs, self.rotation, self.schedule)
+        meta = pickle.dumps((core, segments, offset, checksum), protocol=pickle.HIGHEST_PROTOCOL)
+        base = _artifact_base(len(meta))
+
+        def write(file: BinaryIO) -> None:
+            file.write(_CACHE_HEADER.pack(b"PLAY", _ARTIFACT_VERSION, len(meta)))
+            file.write(meta)
+            file.write(bytes(base - file.tell()))
+            for chunk in region():
+                file.write(chunk)
+
+        return _write_atomic(path, write)
+
+    def _artifact_record(self, kind: str, free: bool, wall_steps: int = 0) -> Optional[Tuple[str, int]]:
+        offset = self._segments.get((kind, free, wall_steps))
+        return None if offset is None else (self.artifact_path, offset)
+
+    def _setup(self, cache_dir: Optional[str]) -> None:
+        """Phần khởi tạo chung của constructor và `_load_artifact`."""
         start_layout = self.layouts[0]
-        self.initial_state = PacmanState(
+        self.cache_dir = cache_dir
+        self._distances: Dict[Tuple[bool, int], DistanceTable] = {}
+        self._ghost_distances: Dict[bool, GhostDistanceTable] = {}
+        self._corridors: Optional[CorridorGraph] = None
+        self.zobrist = ZobristKeys(self.rotation, self.PIE_DURATION + 1, len(self.schedule))
+        self.initial_state = self.make_state(
             pacman_pos=start_layout.pacman_start,
-            food=start_layout.food,
-            pies=start_layout.pies,
-            ghosts=start_layout.ghost_starts,
+            food=start_layout.mask(start_layout.food),
+            pies=start_layout.mask(start_layout.pies),
             pie_timer=0,
-            time_step=0,
+            phase=0,
             layout_index=0,
         )
 
+    def make_state(
+        self,
+        pacman_pos: Point,
+        food: int,
+        pies: int,
+        pie_timer: int,
+        phase: int,
+        layout_index: int,
+    ) -> PacmanState:
+        """Dựng trạng thái và tính hash Zobrist đầy đủ (successor chỉ cập nhật tăng dần)."""
+        layout = self.layouts[layout_index]
+        keys = self.zobrist
+        z = keys.pacman[layout_index][layout.index(pacman_pos)] ^ keys.layout[layout_index]
+        z ^= keys.pie_timer[pie_timer] ^ keys.phase[phase]
+        for mask, table in ((food, keys.food[layout_index]), (pies, keys.pies[layout_index])):
+            while mask:
+                low = mask & -mask
+                z ^= table[low.bit_length() - 1]
+                mask ^= low
+        return PacmanState(pacman_pos, food, pies, pie_timer, phase, layout_index, z)
+
+    def _build_schedule(self) -> GhostSchedule:
+        cycle = 4 * self.ROTATION_PERIOD
+        ghosts = self.layouts[0].ghost_starts
+        seen: Dict[Tuple[int, Tuple[GhostState, ...]], int] = {}
+        table: List[Tuple[GhostState, ...]] = []
+        blocked: List[FrozenSet[Point]] = []
+        layout_of: List[int] = []
+        t = 0
+        while (t % cycle, ghosts) not in seen:
+            seen[(t % cycle, ghosts)] = t
+            layout_index = (t // self.ROTATION_PERIOD) % 4
+            layout = self.layouts[layout_index]
+            moved = tuple(_move_ghost(g, layout) for g in ghosts)
+            table.append(ghosts)
+            blocked.append(frozenset(g.position for g in ghosts + moved))
+            layout_of.append(layout_index)
+            t += 1
+            if t % self.ROTATION_PERIOD == 0:
+                rotate = lambda p: _rotate_point(p, layout.width, layout.height)
+                moved = tuple(GhostState(rotate(g.position), 1) for g in moved)
+            ghosts = moved
+
+        loop_start = seen[(t % cycle, ghosts)]
+        return GhostSchedule(
+            ghosts=tuple(table),
+            blocked=tuple(blocked),
+            layout_index=tuple(layout_of),
+            next_phase=tuple(range(1, t)) + (loop_start,),
+            loop_start=loop_start,
+        )
+
+    def distances(self, free: bool = False, wall_steps: int = 0) -> DistanceTable:
+        """Bảng khoảng cách dùng chung (có tường, hoặc bỏ tường nếu `free`).
+
+        `wall_steps = k` cho metric mà `k` bước đầu được xuyên tường (trạng thái
+        có `pie_timer = k`). Ma trận được cache trong `cache_dir` (`None` để chỉ
+        giữ trong RAM).
+        """
+        key = (free, 0 if free else wall_steps)
+        table = self._distances.get(key)
+        if table is None:
+            record = self._artifact_record("distances", free, key[1])
+            previous = self.distances(wall_steps=key[1] - 1) if key[1] and record is None else None
+            table = self._distances[key] = DistanceTable(
+                self.graphs[0],
+                self.rotation,
+                free,
+                self.cache_dir,
+                key[1],
+                previous,
+                record,
+            )
+        return table
+
+    def timer_distances(self) -> List[DistanceTable]:
+        """Bảng `distances(wall_steps=t)` cho mọi `pie_timer` t = 0..`PIE_DURATION`."""
+        return [self.distances(wall_steps=t) for t in range(self.PIE_DURATION + 1)]
+
+    def corridors(self) -> CorridorGraph:
+        """`CorridorGraph` của layout 0 (dựng lười); ô dừng là food/pie ban đầu, exit và góc."""
+        if self._corridors is None:
+            start = self.initial_state
+            rotation = self.rotation
+            stops = rotation.canonical_mask(start.layout_index, start.food | start.pies)
+            stops |= (1 << self.graphs[0].goal) | self.graphs[0].corner_mask
+            self._corridors = compile_corridors(self.graphs[0], stops)
+        return self._corridors
+
+    def ghost_distances(self, free: bool = False) -> GhostDistanceTable:
+        """Bảng khoảng cách tới exit theo (ô, phase) dùng chung, có xét lịch của ma."""
+        table = self._ghost_distances.get(free)
+        if table is None:
+            table = self._ghost_distances[free] = GhostDistanceTable(
+                self.graphs,
+                self.rotation,
+                self.schedule,
+                free,
+                self.cache_dir,
+                self._artifact_record("ghosts", free),
+            )
+        return table
+
+    def ghosts_at(self, phase: int) -> Tuple[GhostState, ...]:
+        """Vị trí/hướng các ma tại `phase` (toạ độ của `schedule.layout_index[phase]`)."""
+        return self.schedule.ghosts[phase]
+
     def _parse_layout(self, lines: Sequence[str]) -> PacmanLayout:
         width = max(len(line) for line in lines)
         height = len(lines)
@@ -159,18 +1150,21 @@ class PacmanEnvironment:
         )
 
     def rotate_state(self, state: PacmanState) -> PacmanState:
-        layout = self.layouts[state.layout_index]
-        next_index = (state.layout_index + 1) % 4
-        rotate = lambda p: _rotate_point(p, layout.width, layout.height)
+        """Quay trạng thái sang layout kế tiếp bằng bảng hoán vị (không tính lại hash ô)."""
+        index = state.layout_index
+        next_index = (index + 1) % 4
+        rotation = self.rotation
+        cell = rotation.cell[index][self.layouts[index].index(state.pacman_pos)]
+        layout_keys = self.zobrist.layout
 
         return PacmanState(
-            pacman_pos=rotate(state.pacman_pos),
-            food=frozenset(rotate(p) for p in state.food),
-            pies=frozenset(rotate(p) for p in state.pies),
-            ghosts=tuple(GhostState(rotate(g.position), 1) for g in state.ghosts),
-            pie_timer=state.pie_timer,
-            time_step=state.time_step,
-            layout_index=next_index,
+            self.layouts[next_index].point(cell),
+            rotation.rotate_mask(index, state.food),
+            rotation.rotate_mask(index, state.pies),
+            state.pie_timer,
+            state.phase,
+            next_index,
+            state.zobrist ^ layout_keys[index] ^ layout_keys[next_index],
         )
 
 
@@ -183,125 +1177,184 @@ class PacmanProblem(Problem):
         "Stop": (0, 0),
     }
 
-    def __init__(self, environment: PacmanEnvironment):
+    def __init__(self, environment: PacmanEnvironment, macros: bool = False):
+        """`macros=True`: khi không có pie và layout không có ma, đi thẳng qua
+        hành lang trong một bước (`Action("Macro")`, cost = số ô) và bỏ nhánh cụt
+        (xem `CorridorGraph`); Stop bị bỏ vì không có ma thì đứng chờ không
+        bao giờ có ích (quay layout quay cả Pacman lẫn food). Có ma thì chờ/né
+        trong hành lang có thể cần, nên chế độ này tự tắt."""
         super().__init__(environment.initial_state)
         self.env = environment
+        self._move_actions = {name: Action(name) for name in self.MOVE_DELTAS}
+        self._moves = tuple(self._move_actions[name] for name in MOVE_NAMES)
+        self._stop = self._move_actions["Stop"]
+        self._teleport_actions: Dict[Point, Action] = {}
+        self._macro_actions: Dict[Tuple[str, ...], Action] = {}
+        self._ghost_free = not environment.layouts[0].ghost_starts
+        use_macros = macros and self._ghost_free
+        self.corridors: Optional[CorridorGraph] = environment.corridors() if use_macros else None
 
     def is_goal(self, state: PacmanState) -> bool:
         layout = self.env.layouts[state.layout_index]
         return not state.food and state.pacman_pos == layout.exit_gate
 
     def get_successors(self, state: PacmanState):
-        layout = self.env.layouts[state.layout_index]
+        """Duyệt hàng CSR `free_*` của ô Pacman: tường chỉ đi qua được khi còn pie."""
+        env = self.env
+        graph = env.graphs[state.layout_index]
+        pos = state.pacman_pos
+        cell = pos[0] * graph.width + pos[1]
+        if self.corridors is not None and not state.pie_timer:
+            return self._macro_successors(state, env.rotation.to_canonical[state.layout_index][cell])
+        blocked = env.schedule.blocked[state.phase]
+        point, wall = graph.point, graph.wall
+        targets, kinds = graph.free_targets, graph.free_kind
+        through_walls = state.pie_timer > 0
+        pie_timer = state.pie_timer - 1 if through_walls else 0
+        split = graph.free_split[cell]
         successors: List[Tuple[PacmanState, Action, int]] = []
 
-        for move_name, delta in self.MOVE_DELTAS.items():
-            successors.extend(self._apply_move(state, layout, move_name, delta))
+        for e in range(graph.free_offsets[cell], split):
+            target = targets[e]
+            if wall[target] and not through_walls:
+                continue
+            if point[target] in blocked:
+                continue
+            successors.append((self._advance(state, graph, target, pie_timer), self._moves[kinds[e]], 1))
+
+        if (through_walls or not wall[cell]) and pos not in blocked and self.corridors is None:
+            successors.append((self._advance(state, graph, cell, state.pie_timer), self._stop, 1))
 
-        if layout.corner_name(state.pacman_pos):
-            for _, target in layout.teleports.items():
-                if target != state.pacman_pos:
-                    teleported = self._apply_teleport(state, layout, target)
-                    if teleported is not None:
-                        successors.append((teleported, Action("Teleport", payload={"to": target}), 1))
+        for e in range(split, graph.free_offsets[cell + 1]):
+            target = targets[e]
+            new_pos = point[target]
+            if new_pos in blocked:
+                continue
+            successors.append((self._advance(state, graph, target, pie_timer), self._teleport(new_pos), 1))
 
         return successors
 
-    def _apply_move(
-        self,
-        state: PacmanState,
-        layout: PacmanLayout,
-        move_name: str,
-        delta: Point,
-    ) -> Iterable[Tuple[PacmanState, Action, int]]:
-        dr, dc = delta
-        new_pos = (state.pacman_pos[0] + dr, state.pacman_pos[1] + dc)
-
-        if not layout.in_bounds(new_pos):
-            return []
-        if layout.is_wall(new_pos) and state.pie_timer <= 0:
-            return []
-        if any(g.position == new_pos for g in state.ghosts):
-            return []
-
-        pie_timer = max(state.pie_timer - 1, 0) if move_name != "Stop" else state.pie_timer
-        remaining_pies = state.pies
-        if new_pos in state.pies:
-            pie_timer = self.env.PIE_DURATION
-            remaining_pies = frozenset(p for p in state.pies if p != new_pos)
+    def dominance_key(self, state: PacmanState) -> int:
+        """Hash Zobrist bỏ khoá `pie_timer`; không có ma thì bỏ cả khoá phase và
+        layout (khoá ô sinh theo layout 0 nên hash còn lại bất biến khi quay)."""
+        keys = self.env.zobrist
+        key = state.zobrist ^ keys.pie_timer[state.pie_timer]
+        if self._ghost_free:
+            key ^= keys.phase[state.phase] ^ keys.layout[state.layout_index]
+        return key
 
-        remaining_food = state.food
-        if new_pos in state.food:
-            remaining_food = frozenset(p for p in state.food if p != new_pos)
+    def dominates(self, a: PacmanState, b: PacmanState) -> bool:
+        """`a` trội `b` khi cùng vị trí, food, pie và `a.pie_timer >= b.pie_timer`:
+        còn nhiều bước xuyên tường hơn thì mọi nước của `b` đều đi được.
 
-        ghosts = tuple(self._move_ghost(g, layout) for g in state.ghosts)
-        if any(g.position == new_pos for g in ghosts):
-            return []
+        Có ma thì còn phải cùng phase (ma, thời điểm quay). Không có ma, phase chỉ
+        quyết định góc quay, mà quay là đẳng cấu của cả mê cung (Pacman, food,
+        pie, exit quay cùng nhau), nên chỉ cần trùng nhau sau khi đưa về layout 0.
+        """
+        if a.pie_timer < b.pie_timer:
+            return False
+        if a.layout_index == b.layout_index and (self._ghost_free or a.phase == b.phase):
+            return a.pacman_pos == b.pacman_pos and a.food == b.food and a.pies == b.pies
+        if not self._ghost_free:
+            return False
+        return self._canonical(a) == self._canonical(b)
 
-        next_time = state.time_step + 1
-        next_state = PacmanState(
-            pacman_pos=new_pos,
-            food=remaining_food,
-            pies=remaining_pies,
-            ghosts=ghosts,
-            pie_timer=pie_timer,
-            time_step=next_time,
-            layout_index=state.layout_index,
-        )
+    def _canonical(self, state: PacmanState) -> Tuple[int, int, int]:
+        """(ô Pacman, food, pie) của `state` đổi về chỉ số ô layout 0."""
+        env = self.env
+        index = state.layout_index
+        pos = state.pacman_pos
+        cell = env.rotation.to_canonical[index][pos[0] * env.graphs[index].width + pos[1]]
+        return cell, env.rotation.canonical_mask(index, state.food), env.rotation.canonical_mask(index, state.pies)
+
+    def expand_path(self, path: Sequence[Action]) -> List[Action]:
+        """Trải các `Macro` trong `path` thành dãy bước đơn tương ứng."""
+        expanded: List[Action] = []
+        for action in path:
+            if action.type == "Macro":
+                expanded.extend(self._move_actions[name] for name in action.payload["moves"])
+            else:
+                expanded.append(action)
+        return expanded
 
-        if next_time % self.env.ROTATION_PERIOD == 0:
-            next_state = self.env.rotate_state(next_state)
+    def _macro_successors(self, state: PacmanState, canonical: int):
+        """Mỗi lối ra của ô chuẩn `canonical` là một bước: đi hết dãy ô trong
+        `corridors.paths`, từng ô qua `_advance` (phase, quay layout) như bước đơn."""
+        env = self.env
+        from_canonical = env.rotation.from_canonical
+        successors: List[Tuple[PacmanState, Action, int]] = []
+        for run in self.corridors.paths[canonical]:
+            current, kinds = state, []
+            for step in run:
+                graph = env.graphs[current.layout_index]
+                pos = current.pacman_pos
+                cell = pos[0] * graph.width + pos[1]
+                target = from_canonical[current.layout_index][step]
+                for e in range(graph.free_offsets[cell], graph.free_offsets[cell + 1]):
+                    if graph.free_targets[e] == target:
+                        kinds.append(graph.free_kind[e])
+                        break
+                current = self._advance(current, graph, target, 0)
+            if len(run) == 1:
+                kind = kinds[0]
+                action = self._moves[kind] if kind != TELEPORT else self._teleport(graph.point[target])
+            else:
+                names = tuple(MOVE_NAMES[kind] for kind in kinds)
+                action = self._macro_actions.get(names)
+                if action is None:
+                    action = self._macro_actions[names] = Action("Macro", payload={"moves": names})
+            successors.append((current, action, len(run)))
+        return successors
 
-        return [(next_state, Action(move_name), 1)]
+    def _teleport(self, new_pos: Point) -> Action:
+        action = self._teleport_actions.get(new_pos)
+        if action is None:
+            action = self._teleport_actions[new_pos] = Action("Teleport", payload={"to": new_pos})
+        return action
 
-    def _apply_teleport(
+    def _advance(
         self,
         state: PacmanState,
-        layout: PacmanLayout,
-        target: Point,
-    ) -> Optional[PacmanState]:
-        if any(g.position == target for g in state.ghosts):
-            return None
+        graph: LayoutGraph,
+        cell: int,
+        pie_timer: int,
+    ) -> PacmanState:
+        """Trạng thái sau khi Pacman tới ô `cell`; hash Zobrist cập nhật tăng dần."""
+        env = self.env
+        keys = env.zobrist
+        layout_index = state.layout_index
+        pacman_keys = keys.pacman[layout_index]
+        bit = 1 << cell
+        old_pos = state.pacman_pos
+        z = state.zobrist ^ pacman_keys[old_pos[0] * graph.width + old_pos[1]] ^ pacman_keys[cell]
 
-        pie_timer = max(state.pie_timer - 1, 0)
-        remaining_food = state.food
         remaining_pies = state.pies
-        if target in remaining_food:
-            remaining_food = frozenset(p for p in remaining_food if p != target)
-        if target in remaining_pies:
-            pie_timer = self.env.PIE_DURATION
-            remaining_pies = frozenset(p for p in remaining_pies if p != target)
-
-        ghosts = tuple(self._move_ghost(g, layout) for g in state.ghosts)
-        if any(g.position == target for g in ghosts):
-            return None
+        if remaining_pies & bit:
+            pie_timer = env.PIE_DURATION
+            remaining_pies ^= bit
+            z ^= keys.pies[layout_index][cell]
 
-        next_time = state.time_step + 1
-        new_state = PacmanState(
-            pacman_pos=target,
-            food=remaining_food,
-            pies=remaining_pies,
-            ghosts=ghosts,
-            pie_timer=pie_timer,
-            time_step=next_time,
-            layout_index=state.layout_index,
-        )
-        if next_time % self.env.ROTATION_PERIOD == 0:
-            new_state = self.env.rotate_state(new_state)
-        return new_state
-
-    def _move_ghost(self, ghost: GhostState, layout: PacmanLayout) -> GhostState:
-        row, col = ghost.position
-        next_col = col + ghost.direction
-        next_pos = (row, next_col)
-        if not layout.in_bounds(next_pos) or layout.is_wall(next_pos):
-            ghost = GhostState(ghost.position, -ghost.direction)
-            next_pos = (row, col + ghost.direction)
+        remaining_food = state.food
+        if remaining_food & bit:
+            remaining_food ^= bit
+            z ^= keys.food[layout_index][cell]
 
-        if not layout.in_bounds(next_pos) or layout.is_wall(next_pos):
-            return GhostState(ghost.position, ghost.direction)
+        next_phase = env.schedule.next_phase[state.phase]
+        z ^= keys.pie_timer[state.pie_timer] ^ keys.pie_timer[pie_timer]
+        z ^= keys.phase[state.phase] ^ keys.phase[next_phase]
+        next_state = PacmanState(
+            graph.point[cell],
+            remaining_food,
+            remaining_pies,
+            pie_timer,
+            next_phase,
+            layout_index,
+            z,
+        )
 
-        return GhostState(next_pos, ghost.direction)
+        if env.schedule.layout_index[next_phase] != layout_index:
+            next_state = env.rotate_state(next_state)
+        return next_state
 
 
 __all__ = [
@@ -309,6 +1362,17 @@ __all__ = [
     "PacmanLayout",
     "PacmanState",
     "GhostState",
+    "GhostSchedule",
+    "LayoutGraph",
+    "DistanceTable",
+    "GhostDistanceTable",
+    "compile_layout",
+    "CorridorGraph",
+    "compile_corridors",
+    "load_cached_array",
+    "store_cached_array",
+    "RotationTables",
+    "ZobristKeys",
     "PacmanProblem",
     "Point",
 ]
@@ -1,29 +1,147 @@
 from __future__ import annotations
 
-import heapq
-from collections import deque
-from typing import Deque, Dict, Iterable, List, Tuple
+import hashlib
+import math
+import os
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from puzzle import Heuristic
 
-from .environment import PacmanEnvironment, PacmanLayout, PacmanState, Point
+from .environment import (
+    DistanceTable,
+    GhostDistanceTable,
+    PacmanEnvironment,
+    PacmanState,
+    Point,
+    load_cached_array,
+    store_cached_array,
+)
 
 
 def _manhattan(a: Point, b: Point) -> int:
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
 
-def _neighbors(layout: PacmanLayout, pos: Point) -> List[Point]:
-    r, c = pos
-    moves = [(r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)]
-    valid = [p for p in moves if layout.in_bounds(p) and not layout.is_wall(p)]
+def _dense_prim(points: List[int], table: DistanceTable) -> int:
+    """Prim O(n²) trên ma trận con `table.row(u)[v]` của `points` (không dùng heap).
 
-    corner = layout.corner_name(pos)
-    if corner:
-        for name, target in layout.teleports.items():
-            if target != pos and not layout.is_wall(target):
-                valid.append(target)
-    return valid
+    Metric có tường không đối xứng (teleport lên góc là tường rồi bước ra được,
+    chiều ngược lại thì không), nên mỗi cạnh lấy chiều ngắn hơn để MST vẫn là
+    cận dưới; metric bỏ tường đối xứng nên bỏ qua bước này.
+    """
+    if len(points) <= 1:
+        return 0
+
+    symmetric = table.free
+    remaining = points[1:]
+    root = points[0]
+    first = table.row(root)
+    best = [first[v] for v in remaining]
+    if not symmetric:
+        best = [b if b <= table.row(v)[root] else table.row(v)[root] for b, v in zip(best, remaining)]
+    total = 0
+    while remaining:
+        k = min(range(len(best)), key=best.__getitem__)
+        total += best[k]
+        node = remaining[k]
+        remaining[k], best[k] = remaining[-1], best[-1]
+        remaining.pop()
+        best.pop()
+        row = table.row(node)
+        best = [b if b <= row[v] else row[v] for b, v in zip(best, remaining)]
+        if not symmetric:
+            best = [b if b <= table.row(v)[node] else table.row(v)[node] for b, v in zip(best, remaining)]
+    return total
+
+
+class MSTCache:
+    """Cache LRU dùng chung cho chi phí MST trên `food ∪ {exit}`.
+
+    Khoá là (metric, bitmask food đổi về layout 0), nên mọi trạng thái có cùng
+    phần food còn lại — ở bất kỳ vị trí Pacman, phase, timer hay layout quay
+    nào — dùng chung một lần tính MST.
+    """
+
+    def __init__(self, maxsize: int = 65536):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._costs: "OrderedDict[Tuple[bool, int, int], int]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._costs)
+
+    def cost(self, table: DistanceTable, food: int) -> int:
+        """MST theo metric `table` trên `food ∪ {exit}` (`food` là bitmask chuẩn, khác 0)."""
+        key = (table.free, table.wall_steps, food)
+        cost = self._costs.get(key)
+        if cost is not None:
+            self.hits += 1
+            self._costs.move_to_end(key)
+            return cost
+
+        self.misses += 1
+        mask = food
+        points = [table.goal]
+        while mask:
+            low = mask & -mask
+            points.append(low.bit_length() - 1)
+            mask ^= low
+        cost = self._costs[key] = _dense_prim(points, table)
+        if len(self._costs) > self.maxsize:
+            self._costs.popitem(last=False)
+            self.evictions += 1
+        return cost
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._costs),
+            "hit_rate": self.hit_rate,
+        }
+
+
+def _nearest_target(env: PacmanEnvironment, table: DistanceTable, state: PacmanState) -> int:
+    """Khoảng cách theo `table` từ Pacman tới food gần nhất, hoặc tới exit nếu hết food."""
+    layout_index = state.layout_index
+    row = table.row(table.canonical(layout_index, env.layouts[layout_index].index(state.pacman_pos)))
+    if not state.food:
+        return row[table.goal]
+    return min(row[cell] for cell in table.cells(layout_index, state.food))
+
+
+def _split_on_pies(
+    table: DistanceTable,
+    free: DistanceTable,
+    layout_index: int,
+    pies: int,
+    row: Sequence[int],
+    h_table: int,
+    h_free: int,
+) -> int:
+    """Giữ admissible khi còn pie chưa ăn.
+
+    `h_table` (metric `table`, `row` là hàng của Pacman) chỉ đúng nếu không ăn
+    thêm pie nào; nếu ăn thì đường đi tới pie đầu tiên vẫn theo `table`, sau đó
+    ít nhất `d_free(pie, exit)`, và toàn bộ không ngắn hơn `h_free`.
+    """
+    if not pies:
+        return h_table
+    goal = free.goal
+    via_pie = min(row[pie] + free.row(pie)[goal] for pie in table.cells(layout_index, pies))
+    return min(h_table, max(h_free, via_pie))
 
 
 class PieAwareHeuristic(Heuristic):
@@ -31,6 +149,7 @@ class PieAwareHeuristic(Heuristic):
 
     def __init__(self, environment: PacmanEnvironment):
         self.env = environment
+        self.free = environment.distances(free=True)
         self._distance_cache: Dict[Tuple[int, Point, Point], int] = {}
 
     def _distance(self, layout_index: int, start: Point, goal: Point) -> int:
@@ -59,7 +178,7 @@ class PieAwareHeuristic(Heuristic):
 
         min_food = min(
             self._distance(state.layout_index, state.pacman_pos, food_pos)
-            for food_pos in state.food
+            for food_pos in layout.points(state.food)
         )
 
         if state.pie_timer > 0:
@@ -69,339 +188,475 @@ class PieAwareHeuristic(Heuristic):
         if state.pies:
             min_pie = min(
                 self._distance(state.layout_index, state.pacman_pos, pie_pos)
-                for pie_pos in state.pies
+                for pie_pos in layout.points(state.pies)
             )
             pie_benefit = 3.0 / (min_pie + 1.0)
 
         factor = 1.0 - min(pie_benefit, self.PIE_BENEFIT_CAP)
         return int(min_food * factor)
 
+    def upper_bound(self, state: PacmanState) -> int:
+        """Manhattan có teleport không vượt quá khoảng cách BFS bỏ tường tới food gần nhất (hoặc exit)."""
+        return _nearest_target(self.env, self.free, state)
+
 
 class FoodMSTHeuristic(Heuristic):
     """Heuristic MST với BFS bỏ tường (giữ để tham chiếu)."""
 
-    def __init__(self, environment: PacmanEnvironment):
+    def __init__(self, environment: PacmanEnvironment, mst_cache: Optional[MSTCache] = None):
         self.env = environment
-        self._bfs_cache: Dict[Tuple[int, Point], Dict[Point, int]] = {}
+        self.distances = environment.distances(free=True)
+        self.mst_cache = mst_cache if mst_cache is not None else MSTCache()
 
     def calculate(self, state: PacmanState) -> int:
+        table = self.distances
         layout_index = state.layout_index
-        layout = self.env.layouts[layout_index]
+        start = table.canonical(layout_index, self.env.layouts[layout_index].index(state.pacman_pos))
         if not state.food:
-            return self._lower_bound_distance(layout_index, layout, state.pacman_pos, layout.exit_gate)
+            return table.row(start)[table.goal]
 
-        targets = list(state.food) + [layout.exit_gate]
-        points = [state.pacman_pos] + targets
-        pairwise = self._pairwise_lower_bounds(layout_index, layout, points)
-        return self._mst_cost(points, pairwise)
+        # Cây khung chứa cả vị trí Pacman nên không cache theo food được.
+        return _dense_prim([start] + table.cells(layout_index, state.food) + [table.goal], table)
 
-    def _pairwise_lower_bounds(
-        self,
-        layout_index: int,
-        layout: PacmanLayout,
-        points: List[Point],
-    ) -> Dict[Tuple[Point, Point], int]:
-        bounds: Dict[Tuple[Point, Point], int] = {}
-        for i, src in enumerate(points):
-            distances = self._bfs_ignoring_walls(layout_index, layout, src)
-            for j in range(i + 1, len(points)):
-                dst = points[j]
-                bounds[(src, dst)] = bounds[(dst, src)] = distances.get(dst, 0)
-        return bounds
-
-    def _mst_cost(
-        self,
-        points: List[Point],
-        distances: Dict[Tuple[Point, Point], int],
-    ) -> int:
-        if len(points) <= 1:
-            return 0
-
-        visited = {points[0]}
-        edges = [
-            (distances[(points[0], other)], points[0], other)
-            for other in points[1:]
-        ]
-        heapq.heapify(edges)
-        total = 0
-
-        while edges and len(visited) < len(points):
-            weight, _, node = heapq.heappop(edges)
-            if node in visited:
-                continue
-            visited.add(node)
-            total += weight
-            for other in points:
-                if other not in visited:
-                    heapq.heappush(edges, (distances[(node, other)], node, other))
-
-        return total
-
-    def _lower_bound_distance(self, layout_index: int, layout: PacmanLayout, start: Point, goal: Point) -> int:
-        return self._bfs_ignoring_walls(layout_index, layout, start).get(goal, 0)
-
-    def _bfs_ignoring_walls(self, layout_index: int, layout: PacmanLayout, start: Point) -> Dict[Point, int]:
-        key = (layout_index, start)
-        if key in self._bfs_cache:
-            return self._bfs_cache[key]
-
-        queue: deque[Tuple[Point, int]] = deque([(start, 0)])
-        visited = {start}
-        distances = {start: 0}
-
-        while queue:
-            pos, dist = queue.popleft()
-            row, col = pos
-            for delta in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbour = (row + delta[0], col + delta[1])
-                if not layout.in_bounds(neighbour) or neighbour in visited:
-                    continue
-                visited.add(neighbour)
-                distances[neighbour] = dist + 1
-                queue.append((neighbour, dist + 1))
-
-            corner = layout.corner_name(pos)
-            if corner:
-                for _, corner_pos in layout.teleports.items():
-                    if corner_pos not in visited:
-                        visited.add(corner_pos)
-                        distances[corner_pos] = dist + 1
-                        queue.append((corner_pos, dist + 1))
-
-        self._bfs_cache[key] = distances
-        return distances
+    def upper_bound(self, state: PacmanState) -> int:
+        """Nối Pacman vào food gần nhất của MST(`food ∪ {exit}`) cho một cây khung, nên không nhỏ hơn MST."""
+        nearest = _nearest_target(self.env, self.distances, state)
+        if not state.food:
+            return nearest
+        food = self.distances.canonical_mask(state.layout_index, state.food)
+        return nearest + self.mst_cache.cost(self.distances, food)
 
 
 class ExactDistanceHeuristic(Heuristic):
-    """Heuristic dùng khoảng cách ngắn nhất thực tế (có teleport) và MST."""
-
-    def __init__(self, environment: PacmanEnvironment):
-        self.env = environment
-        self.distance_maps: List[Dict[Point, Dict[Point, int]]] = []
-        for layout in self.env.layouts:
-            self.distance_maps.append(self._compute_all_pairs(layout))
-
-    def _compute_all_pairs(self, layout: PacmanLayout) -> Dict[Point, Dict[Point, int]]:
-        passable = [
-            (r, c)
-            for r in range(layout.height)
-            for c in range(layout.width)
-            if not layout.is_wall((r, c))
-        ]
-        distances: Dict[Point, Dict[Point, int]] = {}
-        for cell in passable:
-            distances[cell] = self._bfs_exact(layout, cell)
-        return distances
-
-    def _bfs_exact(self, layout: PacmanLayout, start: Point) -> Dict[Point, int]:
-        queue: deque[Tuple[Point, int]] = deque([(start, 0)])
-        visited = {start}
-        dists = {start: 0}
-
-        while queue:
-            pos, dist = queue.popleft()
-            for nb in _neighbors(layout, pos):
-                if nb in visited:
-                    continue
-                visited.add(nb)
-                dists[nb] = dist + 1
-                queue.append((nb, dist + 1))
-
-        return dists
+    """Heuristic dùng khoảng cách ngắn nhất thực tế (có teleport) và MST.
 
-    def _distance(self, layout_index: int, start: Point, goal: Point) -> int:
-        dist = self.distance_maps[layout_index].get(start, {}).get(goal)
-        if dist is None:
-            return 0
-        return dist
-
-    def _mst_cost(self, layout_index: int, points: List[Point]) -> int:
-        if len(points) <= 1:
-            return 0
-
-        visited = {points[0]}
-        edges = []
-        for other in points[1:]:
-            dist = self._distance(layout_index, points[0], other)
-            heapq.heappush(edges, (dist, points[0], other))
-
-        total = 0
-        while edges and len(visited) < len(points):
-            weight, _, node = heapq.heappop(edges)
-            if node in visited:
-                continue
-            visited.add(node)
-            total += weight
-            for other in points:
-                if other not in visited:
-                    dist = self._distance(layout_index, node, other)
-                    heapq.heappush(edges, (dist, node, other))
+    Metric chọn theo `pie_timer`: `timed[t]` cho phép `t` bước đầu xuyên tường.
+    Còn pie thì tách như `ExactMSTHeuristic` (`_split_on_pies`), với cận bỏ tường
+    rẻ là `d_free(Pacman, exit)`.
+    """
 
-        return total
+    def __init__(self, environment: PacmanEnvironment, mst_cache: Optional[MSTCache] = None):
+        self.env = environment
+        self.timed = environment.timer_distances()  # all-pairs trên layout 0, dùng cho cả bốn layout quay
+        self.distances = self.timed[0]
+        self.free = environment.distances(free=True)
+        self.mst_cache = mst_cache if mst_cache is not None else MSTCache()
+
+    def _food_mst(self, pie_timer: int, layout_index: int, food: int) -> Tuple[List[int], int]:
+        """(ô food chuẩn, MST trên `food ∪ {exit}` theo metric của `pie_timer`)."""
+        canonical = self.distances.canonical_mask(layout_index, food)
+        if not canonical:
+            return [], 0
+        return self.env.layouts[0].cells(canonical), self.mst_cache.cost(self.timed[pie_timer], canonical)
+
+    def _with_mst(self, state: PacmanState, foods: List[int], mst_cost: int) -> int:
+        table = self.timed[state.pie_timer]
+        layout_index = state.layout_index
+        start = table.canonical(layout_index, self.env.layouts[layout_index].index(state.pacman_pos))
+        # Kể cả khi đứng trên tường lúc pie vừa hết: CSR có tường vẫn giữ cạnh ra từ ô tường.
+        row = table.row(start)
+        h_table = min(row[cell] for cell in foods) + mst_cost if foods else row[table.goal]
+        if not state.pies:
+            return h_table
+        h_free = self.free.row(start)[self.free.goal]
+        return _split_on_pies(table, self.free, layout_index, state.pies, row, h_table, h_free)
 
     def calculate(self, state: PacmanState) -> int:
-        if state.pie_timer > 0:
-            return 0  # để đảm bảo admissible khi có khả năng xuyên tường
+        return self._with_mst(state, *self._food_mst(state.pie_timer, state.layout_index, state.food))
 
-        layout_index = state.layout_index
-        layout = self.env.layouts[layout_index]
+    def calculate_batch(self, states: Sequence[PacmanState]) -> List[int]:
+        """Các anh em cùng `food` và `pie_timer` chỉ tra `mst_cache` một lần."""
+        msts: Dict[Tuple[int, int, int], Tuple[List[int], int]] = {}
+        values: List[int] = []
+        for state in states:
+            key = (state.pie_timer, state.layout_index, state.food)
+            entry = msts.get(key)
+            if entry is None:
+                entry = msts[key] = self._food_mst(*key)
+            values.append(self._with_mst(state, *entry))
+        return values
 
-        if not state.food:
-            return self._distance(layout_index, state.pacman_pos, layout.exit_gate)
 
-        pacman_to_food = min(
-            self._distance(layout_index, state.pacman_pos, food)
-            for food in state.food
+class ExactMSTHeuristic(Heuristic):
+    """
+    H₁: Exact + MST + hỗ trợ xuyên tường
+    - Dùng BFS thật (có tường, teleport) để tính metric chính xác; với
+      `pie_timer = t` dùng bảng `timed[t]` (t bước đầu được xuyên tường).
+    - Thêm metric 'free' (bỏ tường) để làm cận dưới khi còn pie chưa ăn.
+    - h = minDist + MST theo metric tương ứng; còn pie thì
+      `min(h_t, max(h_free, d_t(Pacman, pie) + d_free(pie, exit)))`.
+    """
+
+    def __init__(self, environment: PacmanEnvironment, mst_cache: Optional[MSTCache] = None):
+        self.env = environment
+        self.timed = environment.timer_distances()
+        self.exact = self.timed[0]
+        self.free = environment.distances(free=True)
+        self.mst_cache = mst_cache if mst_cache is not None else MSTCache()
+
+    def _food_msts(self, pie_timer: int, layout_index: int, food: int) -> Tuple[List[int], int, int]:
+        """(ô food chuẩn, MST trên `food ∪ {exit}` theo metric của `pie_timer` và metric free)."""
+        canonical = self.exact.canonical_mask(layout_index, food)
+        if not canonical:
+            return [], 0, 0
+        return (
+            self.env.layouts[0].cells(canonical),
+            self.mst_cache.cost(self.timed[pie_timer], canonical),
+            self.mst_cache.cost(self.free, canonical),
         )
 
-        targets = list(state.food) + [layout.exit_gate]
-        mst_cost = self._mst_cost(layout_index, targets)
-        return pacman_to_food + mst_cost
+    def _with_msts(self, state: PacmanState, foods: List[int], mst_timed: int, mst_free: int) -> int:
+        table = self.timed[state.pie_timer]
+        layout_index = state.layout_index
+        start = table.canonical(layout_index, self.env.layouts[layout_index].index(state.pacman_pos))
+        free_row = self.free.row(start)
+        # Đứng trên tường (pie vừa hết): đoạn tới food đầu tiên tính theo metric bỏ tường.
+        row = free_row if not state.pie_timer and table.graph.wall[start] else table.row(start)
+        if not foods:
+            goal = table.goal
+            h_timed, h_free = row[goal], free_row[goal]
+        else:
+            h_timed = min(row[cell] for cell in foods) + mst_timed
+            h_free = min(free_row[cell] for cell in foods) + mst_free
+        return _split_on_pies(table, self.free, layout_index, state.pies, row, h_timed, h_free)
 
+    def calculate(self, state: PacmanState) -> int:
+        return self._with_msts(state, *self._food_msts(state.pie_timer, state.layout_index, state.food))
+
+    def calculate_batch(self, states: Sequence[PacmanState]) -> List[int]:
+        """Các anh em cùng `food` và `pie_timer` chỉ tra `mst_cache` một lần."""
+        cache: Dict[Tuple[int, int, int], Tuple[List[int], int, int]] = {}
+        values: List[int] = []
+        for state in states:
+            key = (state.pie_timer, state.layout_index, state.food)
+            entry = cache.get(key)
+            if entry is None:
+                entry = cache[key] = self._food_msts(*key)
+            values.append(self._with_msts(state, *entry))
+        return values
+
+
+_TOUR_VERSION = 1
+
+
+def _held_karp(foods: List[int], table: DistanceTable) -> array:
+    """Quy hoạch động bitmask: `tour[S * n + k]` = đường ngắn nhất xuất phát từ
+    food `k`, đi qua mọi food trong tập con `S` (chứa `k`) rồi kết thúc ở exit."""
+    n = len(foods)
+    goal = table.goal
+    dist = [[table.row(a)[b] for b in foods] for a in foods]
+    tour = array("H", bytes(2 * n << n))
+    for k, cell in enumerate(foods):
+        tour[(1 << k) * n + k] = table.row(cell)[goal]
+    members: List[Tuple[int, ...]] = [()] * (1 << n)
+    for subset in range(1, 1 << n):
+        low = subset & -subset
+        members[subset] = members[subset ^ low] + (low.bit_length() - 1,)
+        if subset == low:
+            continue
+        row = subset * n
+        for k in members[subset]:
+            rest = (subset ^ (1 << k)) * n
+            dk = dist[k]
+            best = min(dk[j] + tour[rest + j] for j in members[subset] if j != k)
+            tour[row + k] = best if best < 0xFFFF else 0xFFFF
+    return tour
+
+
+class FoodTourTable:
+    """Bảng Held-Karp trên food ban đầu của layout 0 theo metric `table`.
+
+    `tour` là mảng `uint16` 2ⁿ·n; nếu có `cache_dir` thì được ghi ra file khoá
+    theo hash của ma trận khoảng cách con (food + exit) và mở lại bằng `mmap`.
+    """
 
-class ExactMSTHeuristic(Heuristic):
+    def __init__(self, table: DistanceTable, foods: List[int], cache_dir: Optional[str] = None):
+        self.table = table
+        self.foods = foods
+        self.path: Optional[str] = None
+        if cache_dir is not None:
+            self.path = os.path.join(cache_dir, f"tours-{self._content_key()}.bin")
+        self._open()
+
+    def _content_key(self) -> str:
+        points = self.foods + [self.table.goal]
+        digest = hashlib.sha256(repr((_TOUR_VERSION, self.foods)).encode())
+        for cell in points:
+            digest.update(bytes(array("H", (self.table.row(cell)[v] for v in points))))
+        return digest.hexdigest()[:20]
+
+    def _open(self) -> None:
+        n = len(self.foods)
+        tour = None
+        if self.path is not None:
+            tour = load_cached_array(self.path, b"PTUR", _TOUR_VERSION, n, n << n)
+        if tour is None:
+            tour = _held_karp(self.foods, self.table)
+            if self.path is not None:
+                if store_cached_array(self.path, b"PTUR", _TOUR_VERSION, n, tour):
+                    tour = load_cached_array(self.path, b"PTUR", _TOUR_VERSION, n, n << n) or tour
+                else:
+                    self.path = None
+        self.tour = tour
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.path is not None:
+            del state["tour"]  # tiến trình con mở lại file bằng mmap
+        else:
+            state["tour"] = array("H", self.tour)
+        return state
+
+    def __setstate__(self, state) -> None:
+        self.__dict__.update(state)
+        if "tour" not in state:
+            self._open()
+
+
+class FoodTourHeuristic(Heuristic):
+    """Chi phí chính xác của hành trình Pacman → mọi food còn lại → exit (Held-Karp).
+
+    Tất cả tập con của food ban đầu (tối đa `MAX_FOOD`) được tính một lần cho
+    mỗi metric; mỗi lần tra là `min_k d(Pacman, food_k) + tour[S][k]`. Metric
+    chọn theo `pie_timer` (`timed[t]`: t bước đầu được xuyên tường); khi còn pie
+    chưa ăn thì lấy min với cận dưới của đường đi qua một pie, nên vẫn admissible.
     """
-    H₁: Exact + MST + hỗ trợ xuyên tường
-    - Dùng BFS thật (có tường, teleport) để tính metric chính xác.
-    - Thêm metric 'free' (bỏ tường) để làm cận dưới khi pie cho phép xuyên tường.
-    - Heuristic = min( h_exact, h_free ) với h = minDist + MST theo metric tương ứng.
+
+    MAX_FOOD = 16
+
+    def __init__(self, environment: PacmanEnvironment, max_food: int = MAX_FOOD):
+        self.env = environment
+        self.timed = environment.timer_distances()
+        self.exact = self.timed[0]
+        self.free = environment.distances(free=True)
+        initial = environment.initial_state
+        self.foods = environment.layouts[0].cells(
+            environment.rotation.canonical_mask(initial.layout_index, initial.food)
+        )
+        if len(self.foods) > max_food:
+            raise ValueError(f"Heuristic tour với {len(self.foods)} food (> {max_food}) không được hỗ trợ.")
+        self._bit = {cell: k for k, cell in enumerate(self.foods)}
+        self._tours: Dict[Tuple[bool, int], FoodTourTable] = {}
+
+    def tours(self, table: DistanceTable) -> FoodTourTable:
+        """Bảng Held-Karp theo metric `table` (dựng lười)."""
+        key = (table.free, table.wall_steps)
+        tours = self._tours.get(key)
+        if tours is None:
+            tours = self._tours[key] = FoodTourTable(table, self.foods, self.env.cache_dir)
+        return tours
+
+    def _subset(self, layout_index: int, food: int) -> List[Tuple[int, int]]:
+        """Các cặp (ô food chuẩn, vị trí trong `tour`) của tập food còn lại."""
+        cells = self.exact.cells(layout_index, food)
+        subset = 0
+        for cell in cells:
+            subset |= 1 << self._bit[cell]
+        row = subset * len(self.foods)
+        return [(cell, row + self._bit[cell]) for cell in cells]
+
+    def _tour(self, table: DistanceTable, row: Sequence[int], entries: List[Tuple[int, int]]) -> int:
+        if not entries:
+            return row[table.goal]
+        tour = self.tours(table).tour
+        return min(row[cell] + tour[offset] for cell, offset in entries)
+
+    def _with_subset(self, state: PacmanState, entries: List[Tuple[int, int]]) -> int:
+        table = self.timed[state.pie_timer]
+        layout_index = state.layout_index
+        start = table.canonical(layout_index, self.env.layouts[layout_index].index(state.pacman_pos))
+        free_row = self.free.row(start)
+        # Đứng trên tường (pie vừa hết): đoạn tới food đầu tiên tính theo metric bỏ tường.
+        row = free_row if not state.pie_timer and table.graph.wall[start] else table.row(start)
+        h_timed = self._tour(table, row, entries)
+        if not state.pies:
+            return h_timed
+        h_free = self._tour(self.free, free_row, entries)
+        return _split_on_pies(table, self.free, layout_index, state.pies, row, h_timed, h_free)
+
+    def calculate(self, state: PacmanState) -> int:
+        return self._with_subset(state, self._subset(state.layout_index, state.food))
+
+    def calculate_batch(self, states: Sequence[PacmanState]) -> List[int]:
+        """Các anh em cùng `food` chỉ đổi bitmask sang tập con một lần."""
+        subsets: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        values: List[int] = []
+        for state in states:
+            key = (state.layout_index, state.food)
+            entries = subsets.get(key)
+            if entries is None:
+                entries = subsets[key] = self._subset(*key)
+            values.append(self._with_subset(state, entries))
+        return values
+
+
+class GhostDistanceHeuristic(Heuristic):
+    """Khoảng cách tới exit trên đồ thị (ô, phase) có xét lịch di chuyển của ma.
+
+    Bỏ qua food nên là cận dưới; metric có tường chỉ dùng khi không còn pie và
+    `pie_timer == 0`, ngược lại dùng bảng xuyên tường. Không tới được exit thì
+    trả `math.inf` để A* bỏ trạng thái (ngõ cụt).
     """
 
     def __init__(self, environment: PacmanEnvironment):
         self.env = environment
-        self._bfs_cache_exact: Dict[Tuple[int, Point], Dict[Point, int]] = {}
-        self._bfs_cache_free: Dict[Tuple[int, Point], Dict[Point, int]] = {}
+        self.walled = environment.ghost_distances()
+        self.free = environment.ghost_distances(free=True)
 
-    def calculate(self, state: PacmanState) -> int:
-        layout_index = state.layout_index
-        layout = self.env.layouts[layout_index]
+    def calculate(self, state: PacmanState) -> float:
+        table = self.free if state.pie_timer or state.pies else self.walled
+        distance = table.distance(state.phase, self.env.layouts[state.layout_index].index(state.pacman_pos))
+        return math.inf if distance == GhostDistanceTable.UNREACHABLE else distance
 
-        def h_with(dist_fn):
-            if not state.food:
-                return dist_fn(layout_index, state.pacman_pos, layout.exit_gate)
-            pac_to_food = min(dist_fn(layout_index, state.pacman_pos, food) for food in state.food)
-            targets = list(state.food) + [layout.exit_gate]
-            mst = self._mst_cost_with(layout_index, targets, dist_fn)
-            return pac_to_food + mst
-
-        h_exact = h_with(self._dist_exact)
-        h_free = h_with(self._dist_free)
-        return min(h_exact, h_free)
-
-    # ---- Neighbours ----
-    def _neighbors_exact(self, layout: PacmanLayout, pos: Point) -> Iterable[Point]:
-        r, c = pos
-        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            nb = (r + dr, c + dc)
-            if layout.in_bounds(nb) and not layout.is_wall(nb):
-                yield nb
-        if layout.corner_name(pos):
-            for _, corner in layout.teleports.items():
-                if corner != pos and not layout.is_wall(corner):
-                    yield corner
-
-    def _neighbors_free(self, layout: PacmanLayout, pos: Point) -> Iterable[Point]:
-        r, c = pos
-        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            nb = (r + dr, c + dc)
-            if layout.in_bounds(nb):
-                yield nb
-        if layout.corner_name(pos):
-            for _, corner in layout.teleports.items():
-                if corner != pos:
-                    yield corner
-
-    # ---- BFS cache ----
-    def _bfs_exact(self, layout_index: int, start: Point) -> Dict[Point, int]:
-        key = (layout_index, start)
-        if key in self._bfs_cache_exact:
-            return self._bfs_cache_exact[key]
 
-        layout = self.env.layouts[layout_index]
-        q: Deque[Point] = deque([start])
-        dist: Dict[Point, int] = {start: 0}
-        while q:
-            u = q.popleft()
-            for v in self._neighbors_exact(layout, u):
-                if v not in dist:
-                    dist[v] = dist[u] + 1
-                    q.append(v)
-        self._bfs_cache_exact[key] = dist
-        return dist
-
-    def _bfs_free(self, layout_index: int, start: Point) -> Dict[Point, int]:
-        key = (layout_index, start)
-        if key in self._bfs_cache_free:
-            return self._bfs_cache_free[key]
+@dataclass
+class HeuristicComponent:
+    """Một thành phần của `CombinedHeuristic` cùng bộ đếm của nó.
 
-        layout = self.env.layouts[layout_index]
-        q: Deque[Point] = deque([start])
-        dist: Dict[Point, int] = {start: 0}
-        while q:
-            u = q.popleft()
-            for v in self._neighbors_free(layout, u):
-                if v not in dist:
-                    dist[v] = dist[u] + 1
-                    q.append(v)
-        self._bfs_cache_free[key] = dist
-        return dist
-
-    def _dist_exact(self, layout_index: int, a: Point, b: Point) -> int:
-        if a == b:
-            return 0
-        return self._bfs_exact(layout_index, a).get(b, 0)
-
-    def _dist_free(self, layout_index: int, a: Point, b: Point) -> int:
-        if a == b:
-            return 0
-        return self._bfs_free(layout_index, a).get(b, 0)
-
-    # ---- MST ----
-    def _mst_cost_with(self, layout_index: int, points: List[Point], dist_fn) -> int:
-        if len(points) <= 1:
-            return 0
-
-        visited = {points[0]}
-        edges: List[Tuple[int, Point, Point]] = []
-        for other in points[1:]:
-            w = dist_fn(layout_index, points[0], other)
-            heapq.heappush(edges, (w, points[0], other))
-
-        total = 0
-        while edges and len(visited) < len(points):
-            w, _, v = heapq.heappop(edges)
-            if v in visited:
-                continue
-            visited.add(v)
-            total += w
-            for other in points:
-                if other not in visited:
-                    heapq.heappush(edges, (dist_fn(layout_index, v, other), v, other))
-        return total
+    `calls`/`time`: số trạng thái đã tính và tổng thời gian tính; `bound_time`:
+    thời gian gọi `upper_bound`; `was_max`: số lần giá trị bằng max cuối cùng;
+    `skipped`: số lần bị bỏ qua vì cận trên không vượt max hiện tại;
+    `use_bound`: tắt sau warmup nếu cận trên hầu như không giúp bỏ qua lần nào.
+    """
+
+    name: str
+    heuristic: Heuristic
+    calls: int = 0
+    time: float = 0.0
+    bound_time: float = 0.0
+    was_max: int = 0
+    skipped: int = 0
+    use_bound: bool = True
+
+    @property
+    def mean_time(self) -> float:
+        """Chi phí trung bình của một lần tính (dùng để sắp thứ tự)."""
+        return self.time / self.calls if self.calls else 0.0
 
 
 class CombinedHeuristic(Heuristic):
-    """Lấy max giữa các heuristic để tăng thông tin nhưng vẫn admissible."""
+    """Lấy max giữa các heuristic để tăng thông tin nhưng vẫn admissible.
+
+    Layout có ma thêm thành phần `ghost` (`GhostDistanceHeuristic`, có thể trả
+    `math.inf` cho ngõ cụt). Sau `warmup` lô đầu (theo thứ tự khai báo), các
+    thành phần được sắp theo chi phí đo được, rẻ trước. Thành phần có
+    `upper_bound(state)` không vượt quá max hiện tại thì bỏ qua. Với
+    `AStar(..., lazy_heuristic=True)`, khi sinh nút chỉ tính `lazy_prefix` thành
+    phần rẻ nhất; phần còn lại tính trong `refine` khi nút sắp được mở rộng.
+    `component_stats()` cho biết thành phần nào đáng chi phí.
+    """
 
-    def __init__(self, environment: PacmanEnvironment):
+    MIN_SKIP_RATE = 0.05
+
+    def __init__(
+        self,
+        environment: PacmanEnvironment,
+        mst_cache: Optional[MSTCache] = None,
+        lazy_prefix: int = 2,
+        warmup: int = 64,
+    ):
+        self.mst_cache = mst_cache if mst_cache is not None else MSTCache()
         self.pie = PieAwareHeuristic(environment)
-        self.mst = FoodMSTHeuristic(environment)
-        self.exact = ExactDistanceHeuristic(environment)
-        self.h1 = ExactMSTHeuristic(environment)
+        self.mst = FoodMSTHeuristic(environment, self.mst_cache)
+        self.exact = ExactDistanceHeuristic(environment, self.mst_cache)
+        self.h1 = ExactMSTHeuristic(environment, self.mst_cache)
+        self.components = [
+            HeuristicComponent("exact", self.exact),
+            HeuristicComponent("exact-mst", self.h1),
+            HeuristicComponent("pie", self.pie),
+            HeuristicComponent("mst", self.mst),
+        ]
+        self.ghost: Optional[GhostDistanceHeuristic] = None
+        if environment.layouts[0].ghost_starts:
+            self.ghost = GhostDistanceHeuristic(environment)
+            self.components.insert(0, HeuristicComponent("ghost", self.ghost))
+        self.lazy_prefix = lazy_prefix
+        self.warmup = warmup
+        self._batches = 0
+
+    def _evaluate(self, components: List[HeuristicComponent], states: Sequence[PacmanState], values: List[int]) -> None:
+        """Cập nhật `values` (max hiện tại của từng trạng thái) bằng các thành phần theo thứ tự."""
+        clock = time.perf_counter
+        results: List[Tuple[HeuristicComponent, List[int], List[int]]] = []
+        for component in components:
+            pending = [i for i, h in enumerate(values) if h != math.inf]  # ngõ cụt: không cần tính thêm
+            bound = getattr(component.heuristic, "upper_bound", None) if component.use_bound else None
+            if bound is not None:
+                started = clock()
+                pending = [i for i in pending if bound(states[i]) > values[i]]
+                component.bound_time += clock() - started
+                component.skipped += len(states) - len(pending)
+            if not pending:
+                continue
+            started = clock()
+            component_values = component.heuristic.calculate_batch([states[i] for i in pending])
+            component.time += clock() - started
+            component.calls += len(pending)
+            for i, h in zip(pending, component_values):
+                if h > values[i]:
+                    values[i] = h
+            results.append((component, pending, component_values))
+        for component, pending, component_values in results:
+            component.was_max += sum(1 for i, h in zip(pending, component_values) if h == values[i])
+
+    def _tick(self) -> bool:
+        """Đếm lô; khi hết warmup thì sắp thành phần theo chi phí và trả `True` từ đó."""
+        if self._batches < self.warmup:
+            self._batches += 1
+            if self._batches == self.warmup:
+                # Thành phần luôn bị bỏ qua trong warmup (chưa đo được) xếp cuối.
+                self.components.sort(key=lambda c: c.mean_time if c.calls else math.inf)
+                for component in self.components:
+                    if component.skipped < self.MIN_SKIP_RATE * (component.calls + component.skipped):
+                        component.use_bound = False
+            return False
+        return True
 
     def calculate(self, state: PacmanState) -> int:
-        return max(
-            self.pie.calculate(state),
-            self.mst.calculate(state),
-            self.exact.calculate(state),
-            self.h1.calculate(state),
-        )
+        return self.calculate_batch([state])[0]
+
+    def calculate_batch(self, states: Sequence[PacmanState]) -> List[int]:
+        self._tick()
+        values = [0] * len(states)
+        self._evaluate(self.components, states, values)
+        return values
+
+    def calculate_lazy_batch(self, states: Sequence[PacmanState]) -> List[int]:
+        """Chỉ `lazy_prefix` thành phần rẻ nhất (trong warmup thì tính đầy đủ)."""
+        components = self.components[: self.lazy_prefix] if self._tick() else self.components
+        values = [0] * len(states)
+        self._evaluate(components, states, values)
+        return values
+
+    def refine(self, state: PacmanState, h: int) -> int:
+        values = [h]
+        self._evaluate(self.components[self.lazy_prefix:], [state], values)
+        return values[0]
+
+    def component_stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            component.name: {
+                "calls": component.calls,
+                "time": component.time,
+                "bound_time": component.bound_time,
+                "mean_us": component.mean_time * 1e6,
+                "was_max": component.was_max,
+                "skipped": component.skipped,
+                "use_bound": component.use_bound,
+            }
+            for component in self.components
+        }
 
 
 __all__ = [
+    "HeuristicComponent",
+    "MSTCache",
     "PieAwareHeuristic",
     "FoodMSTHeuristic",
     "ExactDistanceHeuristic",
     "ExactMSTHeuristic",
+    "FoodTourHeuristic",
+    "FoodTourTable",
+    "GhostDistanceHeuristic",
     "CombinedHeuristic",
 ]
@@ -5,7 +5,10 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
+from puzzle.instrumentation import SearchInstrumentation
+
 from . import run_auto_mode
+from .environment import DEFAULT_CACHE_DIR, PacmanEnvironment
 
 
 DEFAULT_LAYOUT = [
@@ -49,10 +52,114 @@ def main() -> None:
             "combo",
             "combined",
             "max",
+            "tour",
+            "food-tour",
+            "held-karp",
+            "ghost",
+            "space-time",
         ],
         help="Chọn heuristic. 'auto' (mặc định) tự nhận diện layout; các lựa chọn khác dùng trực tiếp heuristic chỉ định.",
     )
+    parser.add_argument(
+        "--frontier",
+        default="bucket",
+        choices=["bucket", "indexed-heap", "heap"],
+        help="Cấu trúc open list của A*: bucket queue (mặc định), heap có decrease-key, hoặc heapq xoá lười.",
+    )
+    parser.add_argument(
+        "--algorithm",
+        default="astar",
+        choices=["astar", "anytime", "ida", "parallel", "external"],
+        help="Thuật toán tìm kiếm: A* (mặc định), anytime A* có trọng số, IDA* (tiết kiệm bộ nhớ), HDA* song song hoặc A* tràn tập đóng ra đĩa.",
+    )
+    parser.add_argument(
+        "--tie-breaking",
+        default="low-h",
+        choices=["low-h", "high-g", "lifo", "none"],
+        help="Thứ tự giữa các nút cùng f trong A*/anytime (mặc định: low-h).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Số tiến trình cho --algorithm parallel.",
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=None,
+        help="Ngân sách thời gian (giây); khi đặt, A* chạy ở chế độ anytime.",
+    )
+    parser.add_argument(
+        "--max-expansions",
+        type=int,
+        default=None,
+        help="Ngân sách số nút mở rộng; khi đặt, A* chạy ở chế độ anytime.",
+    )
+    parser.add_argument(
+        "--stats-json",
+        action="store_true",
+        help="In thống kê chi tiết của A* (thời gian theo pha, bộ đếm, heuristic theo độ sâu, bộ nhớ đỉnh) dạng JSON.",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=None,
+        help="File snapshot của A*; ghi định kỳ để có thể chạy tiếp khi bị ngắt.",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=None,
+        help="Ghi snapshot sau mỗi N nút mở rộng.",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=None,
+        help="Ghi snapshot sau mỗi T giây (mặc định 60 nếu chỉ đặt --checkpoint).",
+    )
+    parser.add_argument(
+        "--resume-from",
+        type=Path,
+        default=None,
+        help="Tiếp tục tìm kiếm từ một file snapshot.",
+    )
+    parser.add_argument(
+        "--closed-ram-mb",
+        type=float,
+        default=256,
+        help="Trần RAM (MB) cho tập đóng của --algorithm external; vượt quá thì ghi ra đĩa.",
+    )
+    parser.add_argument(
+        "--lazy-heuristic",
+        action="store_true",
+        help="A* chỉ tính phần rẻ của heuristic khi sinh nút, phần đắt khi nút sắp được mở rộng.",
+    )
+    parser.add_argument(
+        "--macros",
+        action="store_true",
+        help="Đi thẳng qua hành lang trong một bước và bỏ nhánh cụt không có food (layout không có ghost).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=Path(DEFAULT_CACHE_DIR),
+        help="Thư mục artifact layout đã biên dịch (layout quay, đồ thị, bảng khoảng cách).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Không đọc/ghi artifact: parse và tính lại mọi bảng.",
+    )
+    parser.add_argument(
+        "--compile-only",
+        action="store_true",
+        help="Chỉ biên dịch layout thành artifact trong --cache-dir rồi thoát.",
+    )
     args = parser.parse_args()
+    if args.checkpoint is not None and args.checkpoint_every is None and args.checkpoint_interval is None:
+        args.checkpoint_interval = 60.0
 
     layout_lines = (
         _read_layout(args.layout)
@@ -60,9 +167,43 @@ def main() -> None:
         else DEFAULT_LAYOUT
     )
 
-    path, cost, expanded, frontier = run_auto_mode(layout_lines, heuristic=args.heuristic)
-    print("Auto mode path:", [str(a) for a in path])
+    cache_dir = None if args.no_cache else str(args.cache_dir)
+    if args.compile_only:
+        environment = PacmanEnvironment.compiled(layout_lines, cache_dir)
+        print("Artifact:", environment.artifact_path or "(không ghi được, chỉ dựng trong RAM)")
+        return
+
+    stats = {}
+    instrumentation = SearchInstrumentation() if args.stats_json else None
+    path, cost, expanded, frontier = run_auto_mode(
+        layout_lines,
+        heuristic=args.heuristic,
+        frontier=args.frontier,
+        algorithm=args.algorithm,
+        time_limit=args.time_limit,
+        max_expansions=args.max_expansions,
+        workers=args.workers,
+        stats=stats,
+        instrumentation=instrumentation,
+        checkpoint_path=args.checkpoint,
+        checkpoint_every=args.checkpoint_every,
+        checkpoint_interval=args.checkpoint_interval,
+        resume_from=args.resume_from,
+        closed_ram_mb=args.closed_ram_mb,
+        lazy_heuristic=args.lazy_heuristic,
+        macros=args.macros,
+        cache_dir=cache_dir,
+        tie_breaking=args.tie_breaking,
+    )
+    if path is None:
+        print("Auto mode: không tìm thấy lời giải trong ngân sách.")
+    else:
+        print("Auto mode path:", [str(a) for a in path])
     print(f"Cost: {cost}  Expanded: {expanded}  Max frontier: {frontier}")
+    if "bound" in stats:
+        print(f"Suboptimality bound: {stats['bound']:.3f}  Weight: {stats.get('weight', 1.0):.2f}")
+    if instrumentation is not None:
+        print(instrumentation.to_json(stats, indent=2))
 
 
 if __name__ == "__main__":
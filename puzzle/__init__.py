@@ -1,5 +1,30 @@
 """Tiện ích chung tái sử dụng từ bài toán Puzzle (Task 1)."""
 
-from .search import Action, Node, Problem, Heuristic, AStar
+from .frontier import (
+    Frontier,
+    HeapFrontier,
+    BucketFrontier,
+    IndexedHeapFrontier,
+    make_frontier,
+)
+from .search import Action, Node, Problem, Heuristic, DominanceIndex, AStar, AnytimeAStar, IDAStar
+from .parallel import ParallelAStar
+from .external import ExternalAStar
 
-__all__ = ["Action", "Node", "Problem", "Heuristic", "AStar"]
+__all__ = [
+    "Action",
+    "Node",
+    "Problem",
+    "Heuristic",
+    "DominanceIndex",
+    "AStar",
+    "AnytimeAStar",
+    "IDAStar",
+    "ParallelAStar",
+    "ExternalAStar",
+    "Frontier",
+    "HeapFrontier",
+    "BucketFrontier",
+    "IndexedHeapFrontier",
+    "make_frontier",
+]
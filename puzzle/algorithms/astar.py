@@ -4,7 +4,7 @@ A* Search Algorithm implementation
 import heapq
 import time
 from typing import List, Tuple, Optional, Dict
-from models.node import Node
+from models.node import Node, make_heap_entry
 from models.action import Action
 from algorithms.problem import Problem
 from algorithms.heuristic import Heuristic
@@ -13,18 +13,26 @@ from algorithms.heuristic import Heuristic
 class AStar:
     """A* search algorithm"""
     
-    def __init__(self, problem: Problem, heuristic: Heuristic):
+    def __init__(self, problem: Problem, heuristic: Heuristic, instrumentation=None, tie_breaking='none'):
         self.problem = problem
         self.heuristic = heuristic
+        self.instrumentation = instrumentation  # optional SearchInstrumentation hook
+        self.tie_breaking = tie_breaking  # 'none', 'low-h', 'high-g', 'lifo' or key(state, g, h)
         self.nodes_expanded = 0
         self.max_frontier_size = 0
     
     def search(self) -> Tuple[Optional[List[Action]], int, Dict]:
         """Search for solution. Returns: (path, cost, statistics)"""
         start_time = time.time()
+        instr = self.instrumentation
+        clock = time.perf_counter
+        if instr is not None:
+            instr.begin()
         
         if self.problem.is_goal(self.problem.initial_state):
             end_time = time.time()
+            if instr is not None:
+                instr.end()
             return [], 0, {
                 'nodes_expanded': 0,
                 'max_frontier_size': 0,
@@ -35,15 +43,28 @@ class AStar:
         h = self.heuristic.calculate(self.problem.initial_state)
         initial_node = Node(self.problem.initial_state, None, None, 0, h)
         
+        heap_entry = make_heap_entry(self.tie_breaking)
+        counter = 0
         frontier = []
-        heapq.heappush(frontier, initial_node)
+        heapq.heappush(frontier, heap_entry(initial_node, counter))
+        if instr is not None:
+            instr.count('pushes')
+            instr.record_heuristics(0, (h,))
         
         explored = set()
         frontier_states = {initial_node.state.to_tuple(): initial_node}
         
         while frontier:
-            current_node = heapq.heappop(frontier)
+            if instr is not None:
+                started = clock()
+                current_node = heapq.heappop(frontier)[-1]
+                instr.add_time('frontier', clock() - started)
+                instr.count('pops')
+            else:
+                current_node = heapq.heappop(frontier)[-1]
             current_state_tuple = current_node.state.to_tuple()
+            if instr is not None and current_state_tuple in explored:
+                instr.count('stale_pops')
             
             if current_state_tuple in frontier_states:
                 del frontier_states[current_state_tuple]
@@ -56,33 +77,60 @@ class AStar:
                     'time': end_time - start_time,
                     'solution_depth': current_node.path_cost
                 }
+                if instr is not None:
+                    instr.end()
                 return current_node.get_path(), current_node.path_cost, stats
             
             explored.add(current_state_tuple)
             self.nodes_expanded += 1
             
-            for next_state, action, cost in self.problem.get_successors(current_node.state):
+            if instr is not None:
+                started = clock()
+                successors = self.problem.get_successors(current_node.state)
+                instr.add_time('successors', clock() - started)
+            else:
+                successors = self.problem.get_successors(current_node.state)
+            
+            for next_state, action, cost in successors:
                 next_state_tuple = next_state.to_tuple()
                 
                 if next_state_tuple in explored:
                     continue
                 
                 g = current_node.path_cost + cost
-                h = self.heuristic.calculate(next_state)
+                if instr is not None:
+                    started = clock()
+                    h = self.heuristic.calculate(next_state)
+                    instr.add_time('heuristic', clock() - started)
+                    instr.record_heuristics(g, (h,))
+                    started = clock()
+                else:
+                    h = self.heuristic.calculate(next_state)
                 child_node = Node(next_state, current_node, action, g, h)
                 
+                counter += 1
+                entry = heap_entry(child_node, counter)
+                pushed = False
                 if next_state_tuple in frontier_states:
                     existing_node = frontier_states[next_state_tuple]
                     if child_node.f_score < existing_node.f_score:
                         frontier_states[next_state_tuple] = child_node
-                        heapq.heappush(frontier, child_node)
+                        heapq.heappush(frontier, entry)
+                        pushed = True
                 else:
                     frontier_states[next_state_tuple] = child_node
-                    heapq.heappush(frontier, child_node)
+                    heapq.heappush(frontier, entry)
+                    pushed = True
+                if instr is not None:
+                    instr.add_time('frontier', clock() - started)
+                    if pushed:
+                        instr.count('pushes')
             
             self.max_frontier_size = max(self.max_frontier_size, len(frontier))
         
         end_time = time.time()
+        if instr is not None:
+            instr.end()
         return None, -1, {
             'nodes_expanded': self.nodes_expanded,
             'time': end_time - start_time
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .nodestore import NodeStore
+
+MAGIC = b"ASTARCK1\n"
+STATES_SUFFIX = ".states"
+CHUNK_SIZE = 4096
+
+
+class Checkpointer:
+    """Ghi snapshot của `AStar` ra đĩa theo chu kỳ và đọc lại để chạy tiếp.
+
+    Gồm hai file:
+    - `<path>.states`: log chỉ-ghi-thêm các trạng thái đã intern, pickle theo
+      từng khúc `CHUNK_SIZE` trạng thái. Mỗi lần checkpoint chỉ ghi phần mới.
+    - `<path>`: header JSON + các cột số của `NodeStore` và id trong frontier
+      dưới dạng byte thô, thay thế nguyên tử bằng `os.replace`.
+
+    Header ghi số trạng thái và độ dài log hợp lệ; phần log thừa do bị ngắt
+    giữa chừng được cắt bỏ khi resume.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        every: Optional[int] = None,
+        interval: Optional[float] = None,
+    ):
+        self.path = os.fspath(path)
+        self.every = every
+        self.interval = interval
+        self.saved = 0
+        self._states_written = 0
+        self._log_bytes = 0
+        self._last_expanded = 0
+        self._last_time = time.perf_counter()
+
+    @property
+    def states_path(self) -> str:
+        return self.path + STATES_SUFFIX
+
+    def start_fresh(self) -> None:
+        with open(self.states_path, "wb"):
+            pass
+        self._states_written = 0
+        self._log_bytes = 0
+
+    def due(self, expanded: int) -> bool:
+        if self.every is not None and expanded - self._last_expanded >= self.every:
+            return True
+        return self.interval is not None and time.perf_counter() - self._last_time >= self.interval
+
+    def save(self, store: NodeStore, frontier_ids: Iterable[int], counters: Dict[str, int]) -> None:
+        with open(self.states_path, "ab") as log:
+            for start in range(self._states_written, len(store), CHUNK_SIZE):
+                pickle.dump(store.states[start:start + CHUNK_SIZE], log, protocol=pickle.HIGHEST_PROTOCOL)
+            log.flush()
+            os.fsync(log.fileno())
+            self._log_bytes = log.tell()
+        self._states_written = len(store)
+
+        ids = array("q", frontier_ids)
+        columns = {name: getattr(store, name) for name in ("g", "h", "parent", "action")}
+        header = {
+            "version": 1,
+            "nodes": len(store),
+            "log_bytes": self._log_bytes,
+            "frontier": len(ids),
+            "typecodes": {name: col.typecode for name, col in columns.items()},
+            "counters": counters,
+        }
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(MAGIC)
+            file.write(json.dumps(header).encode("utf-8") + b"\n")
+            for column in columns.values():
+                column.tofile(file)
+            file.write(bytes(store.closed))
+            ids.tofile(file)
+            pickle.dump(store.actions, file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+
+        self.saved += 1
+        self._last_expanded = counters.get("expanded", 0)
+        self._last_time = time.perf_counter()
+
+    def load(self, path: Optional[str] = None) -> Tuple[NodeStore, List[int], Dict[str, int]]:
+        """Đọc snapshot; trả về (store, id trong frontier, bộ đếm)."""
+        path = os.fspath(path) if path is not None else self.path
+        with open(path, "rb") as file:
+            if file.readline() != MAGIC:
+                raise ValueError(f"'{path}' không phải checkpoint A*.")
+            header = json.loads(file.readline())
+            n = header["nodes"]
+            columns = {}
+            for name, typecode in header["typecodes"].items():
+                column = array(typecode)
+                column.fromfile(file, n)
+                columns[name] = column
+            closed = bytearray(file.read(n))
+            ids = array("q")
+            ids.fromfile(file, header["frontier"])
+            actions = pickle.load(file)
+
+        states: List[object] = []
+        with open(path + STATES_SUFFIX, "r+b") as log:
+            while len(states) < n:
+                states.extend(pickle.load(log))
+            log.truncate(header["log_bytes"])
+        del states[n:]
+
+        store = NodeStore.from_columns(states, columns, closed, actions)
+        if os.fspath(path) == self.path:
+            self._states_written = n
+            self._log_bytes = header["log_bytes"]
+            self._last_expanded = header["counters"].get("expanded", 0)
+        return store, list(ids), header["counters"]
+
+
+__all__ = ["Checkpointer"]
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import bisect
+import heapq
+import math
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from .frontier import make_frontier
+from .nodestore import NO_PARENT, _action_key
+from .search import Action, Heuristic, Problem
+
+_RECORD = struct.Struct("<qi")
+_MASK = (1 << 64) - 1
+
+
+def _fingerprint(state: object) -> int:
+    """Dấu vân tay 64 bit của trạng thái (hash compaction)."""
+    return hash(state) & _MASK
+
+
+class _ClosedSet:
+    """Tập đóng gồm bộ đệm RAM + các run file đã sắp xếp trên đĩa (mmap)."""
+
+    ENTRY_BYTES = 72  # ước lượng chi phí một phần tử `set[int]`
+
+    def __init__(self, directory: str, ram_bytes: int, max_runs: int):
+        self.directory = directory
+        self.capacity = max(1024, ram_bytes // self.ENTRY_BYTES)
+        self.max_runs = max_runs
+        self.buffer: set = set()
+        self.runs: List[Tuple[str, int]] = []
+        self.spills = 0
+        self._next_run = 0
+
+    def __len__(self) -> int:
+        return len(self.buffer) + sum(size for _, size in self.runs)
+
+    def add(self, fingerprint: int) -> None:
+        self.buffer.add(fingerprint)
+        if len(self.buffer) >= self.capacity:
+            self._spill()
+
+    def filter_new(self, fingerprints: List[int]) -> List[bool]:
+        """Phát hiện trùng lặp theo lô: trả `True` cho dấu vân tay chưa đóng."""
+        fresh = [fp not in self.buffer for fp in fingerprints]
+        order = sorted((fp, i) for i, fp in enumerate(fingerprints) if fresh[i])
+        for path, size in self.runs:
+            if not order or size == 0:
+                continue
+            with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped).cast("Q")
+                try:
+                    lo = 0
+                    for fp, i in order:
+                        lo = bisect.bisect_left(view, fp, lo)
+                        if lo < size and view[lo] == fp:
+                            fresh[i] = False
+                finally:
+                    view.release()
+            order = [(fp, i) for fp, i in order if fresh[i]]
+        return fresh
+
+    def _new_run_path(self) -> str:
+        self._next_run += 1
+        return os.path.join(self.directory, f"closed-{self._next_run:05d}.run")
+
+    def _spill(self) -> None:
+        path = self._new_run_path()
+        with open(path, "wb") as file:
+            array("Q", sorted(self.buffer)).tofile(file)
+        self.runs.append((path, len(self.buffer)))
+        self.buffer = set()
+        self.spills += 1
+        if len(self.runs) > self.max_runs:
+            self._merge_runs()
+
+    def _merge_runs(self) -> None:
+        def read(path: str):
+            with open(path, "rb") as file:
+                while True:
+                    chunk = array("Q")
+                    try:
+                        chunk.fromfile(file, 65536)
+                    except EOFError:
+                        pass
+                    if not chunk:
+                        return
+                    yield from chunk
+
+        path = self._new_run_path()
+        size = 0
+        out = array("Q")
+        with open(path, "wb") as file:
+            for fp in heapq.merge(*(read(p) for p, _ in self.runs)):
+                out.append(fp)
+                if len(out) >= 65536:
+                    out.tofile(file)
+                    size += len(out)
+                    out = array("Q")
+            out.tofile(file)
+            size += len(out)
+        for old, _ in self.runs:
+            os.remove(old)
+        self.runs = [(path, size)]
+
+
+class ExternalAStar:
+    """A* với tập đóng tràn ra đĩa và phát hiện trùng lặp trễ theo lô.
+
+    Open list nằm trong RAM. Tập đóng chỉ lưu dấu vân tay 64 bit: bộ đệm RAM
+    giới hạn bởi `closed_ram_bytes`, vượt quá thì ghi thành run file đã sắp
+    xếp (gộp lại khi quá `max_runs`), tra cứu bằng tìm nhị phân trên mmap.
+    Successor được gom vào lô chờ và chỉ được đối chiếu với tập đóng khi lô
+    đầy hoặc khi open không còn nút nào có `f` nhỏ hơn lô chờ (kiểu External
+    A*). Cha/hành động của mỗi nút được ghi vào log trên đĩa để dựng đường đi.
+    Như External A*, giả định heuristic nhất quán (không mở lại nút đã đóng).
+    """
+
+    def __init__(
+        self,
+        problem: Problem,
+        heuristic: Heuristic,
+        frontier: str = "heap",
+        closed_ram_bytes: int = 256 * 1024 * 1024,
+        batch_size: int = 4096,
+        max_runs: int = 16,
+        work_dir: Optional[str] = None,
+    ):
+        self.problem = problem
+        self.heuristic = heuristic
+        self.frontier_kind = frontier
+        self.closed_ram_bytes = closed_ram_bytes
+        self.batch_size = batch_size
+        self.max_runs = max_runs
+        self.work_dir = work_dir
+        self.stats: Dict[str, int] = {}
+
+    def search(self) -> Tuple[Optional[List[Action]], int, int, int]:
+        """Trả về (đường đi, chi phí, số nút expanded, frontier tối đa)."""
+        start = self.problem.initial_state
+        if self.problem.is_goal(start):
+            self.stats = {"expanded": 0, "frontier_max": 1}
+            return [], 0, 0, 1
+
+        directory = tempfile.mkdtemp(prefix="external-astar-", dir=self.work_dir)
+        try:
+            return self._search(directory)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def _search(self, directory: str) -> Tuple[Optional[List[Action]], int, int, int]:
+        closed = _ClosedSet(directory, self.closed_ram_bytes, self.max_runs)
+        log_path = os.path.join(directory, "nodes.log")
+        log = open(log_path, "w+b")
+        actions: List[object] = []
+        action_codes: Dict[object, int] = {}
+        node_count = 0
+
+        def record(parent: int, action: Optional[object]) -> int:
+            nonlocal node_count
+            code = -1
+            if action is not None:
+                key = _action_key(action)
+                code = action_codes.get(key)
+                if code is None:
+                    code = action_codes[key] = len(actions)
+                    actions.append(action)
+            log.write(_RECORD.pack(parent, code))
+            node_count += 1
+            return node_count - 1
+
+        frontier = make_frontier(self.frontier_kind)
+        open_g: Dict[int, int] = {}
+        pending: List[Tuple[object, int, int, Optional[object]]] = []
+        pending_min_f = None
+        duplicates = 0
+
+        def flush() -> None:
+            nonlocal pending, pending_min_f, duplicates
+            batch, pending, pending_min_f = pending, [], None
+            fingerprints = [_fingerprint(item[0]) for item in batch]
+            fresh = closed.filter_new(fingerprints)
+            survivors = []
+            for item, fp, is_new in zip(batch, fingerprints, fresh):
+                if not is_new:
+                    duplicates += 1
+                    continue
+                g_old = open_g.get(fp)
+                if g_old is not None and g_old <= item[1]:
+                    duplicates += 1
+                    continue
+                open_g[fp] = item[1]
+                survivors.append((item, fp))
+            if not survivors:
+                return
+            heuristics = self.heuristic.calculate_batch([item[0] for item, _ in survivors])
+            for ((state, g, parent, action), fp), h in zip(survivors, heuristics):
+                if open_g.get(fp) != g or h == math.inf:
+                    continue
+                node_id = record(parent, action)
+                frontier.push(fp, (state, g, node_id), g + h, h)
+
+        root_h = self.heuristic.calculate(self.problem.initial_state)
+        if root_h == math.inf:
+            self.stats = {"expanded": 0, "frontier_max": 1}
+            return None, -1, 0, 1
+        root_fp = _fingerprint(self.problem.initial_state)
+        open_g[root_fp] = 0
+        frontier.push(root_fp, (self.problem.initial_state, 0, record(NO_PARENT, None)), root_h, root_h)
+        expanded = 0
+        max_frontier_size = 1
+
+        try:
+            while frontier or pending:
+                top = frontier.peek_priority()
+                if pending and (
+                    top is None or len(pending) >= self.batch_size or top > pending_min_f
+                ):
+                    flush()
+                    continue
+
+                max_frontier_size = max(max_frontier_size, len(frontier))
+                fp, (state, g, node_id) = frontier.pop()
+                del open_g[fp]
+
+                if self.problem.is_goal(state):
+                    log.flush()
+                    path = self._trace(log, actions, node_id)
+                    self._record(expanded, max_frontier_size, closed, duplicates, node_count)
+                    return path, g, expanded, max_frontier_size
+
+                closed.add(fp)
+                expanded += 1
+                parent_h = top - g
+                for next_state, action, cost in self.problem.get_successors(state):
+                    new_cost = g + cost
+                    pending.append((next_state, new_cost, node_id, action))
+                    # f của con >= f của cha với heuristic nhất quán.
+                    bound = new_cost + max(parent_h - cost, 0)
+                    if pending_min_f is None or bound < pending_min_f:
+                        pending_min_f = bound
+        finally:
+            log.close()
+
+        self._record(expanded, max_frontier_size, closed, duplicates, node_count)
+        return None, -1, expanded, max_frontier_size
+
+    @staticmethod
+    def _trace(log, actions: List[object], node_id: int) -> List[object]:
+        path: List[object] = []
+        while True:
+            log.seek(node_id * _RECORD.size)
+            parent, code = _RECORD.unpack(log.read(_RECORD.size))
+            if parent == NO_PARENT:
+                break
+            path.append(actions[code])
+            node_id = parent
+        path.reverse()
+        return path
+
+    def _record(self, expanded: int, frontier_max: int, closed: _ClosedSet, duplicates: int, nodes: int) -> None:
+        self.stats = {
+            "expanded": expanded,
+            "frontier_max": frontier_max,
+            "closed": len(closed),
+            "closed_spills": closed.spills,
+            "closed_runs": len(closed.runs),
+            "duplicates": duplicates,
+            "nodes_logged": nodes,
+        }
+
+
+__all__ = ["ExternalAStar"]
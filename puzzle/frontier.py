@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import heapq
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple, Union
+
+Tie = Union[int, Tuple[int, ...]]
+
+
+class Frontier:
+    """Interface hàng đợi ưu tiên cho tập biên (open list) của A*.
+
+    - `push(key, item, f, tie)`: thêm mới hoặc giảm khoá (decrease-key) nếu `key` đã có.
+    - `pop()`: lấy `(key, item)` có `(f, tie)` nhỏ nhất.
+    - `get(key)`: item đang sống của `key` (hoặc `None`).
+    - `peek_priority()`: `f` nhỏ nhất hiện có (hoặc `None` khi rỗng).
+    - `items()`: các cặp `(key, item)` đang sống, không theo thứ tự.
+    - `stale_avoided`: số lần cập nhật tại chỗ thay vì để lại bản sao cũ trong heap.
+    """
+
+    name = "frontier"
+
+    def __init__(self) -> None:
+        self.stale_avoided = 0
+        self.stale_popped = 0
+
+    def push(self, key: Hashable, item: object, f: int, tie: Tie = 0) -> None:
+        raise NotImplementedError
+
+    def pop(self) -> Tuple[Hashable, object]:
+        raise NotImplementedError
+
+    def get(self, key: Hashable) -> Optional[object]:
+        raise NotImplementedError
+
+    def peek_priority(self) -> Optional[int]:
+        raise NotImplementedError
+
+    def items(self) -> Iterator[Tuple[Hashable, object]]:
+        raise NotImplementedError
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+
+class HeapFrontier(Frontier):
+    """`heapq` với xoá lười: bản cũ nằm lại trong heap và bị bỏ qua khi pop.
+
+    Mỗi lần push gắn một số thứ tự tăng dần; `_lookup[key]` giữ số thứ tự của
+    lần push mới nhất, nên bản cũ bị nhận ra kể cả khi `key` và `item` là cùng
+    một đối tượng (vd: id nút của `AStar`) hay khi đẩy lại với `f` lớn hơn.
+    `len()` trả kích thước vật lý của heap (kể cả bản cũ) để so sánh bộ nhớ.
+    """
+
+    name = "heap"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._heap: List[Tuple[int, int, int, Hashable, object]] = []
+        self._lookup: Dict[Hashable, Tuple[int, object]] = {}
+        self._counter = 0
+
+    def push(self, key: Hashable, item: object, f: int, tie: Tie = 0) -> None:
+        self._counter += 1
+        self._lookup[key] = (self._counter, item)
+        heapq.heappush(self._heap, (f, tie, self._counter, key, item))
+
+    def _live(self, entry: Tuple[int, int, int, Hashable, object]) -> bool:
+        current = self._lookup.get(entry[3])
+        return current is not None and current[0] == entry[2]
+
+    def pop(self) -> Tuple[Hashable, object]:
+        heap = self._heap
+        while heap:
+            entry = heapq.heappop(heap)
+            if self._live(entry):
+                del self._lookup[entry[3]]
+                return entry[3], entry[4]
+            self.stale_popped += 1
+        raise IndexError("pop from empty frontier")
+
+    def get(self, key: Hashable) -> Optional[object]:
+        current = self._lookup.get(key)
+        return None if current is None else current[1]
+
+    def peek_priority(self) -> Optional[int]:
+        heap = self._heap
+        while heap and not self._live(heap[0]):
+            heapq.heappop(heap)
+            self.stale_popped += 1
+        return heap[0][0] if heap else None
+
+    def items(self) -> Iterator[Tuple[Hashable, object]]:
+        return ((key, current[1]) for key, current in self._lookup.items())
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __bool__(self) -> bool:
+        return bool(self._lookup)
+
+
+class BucketFrontier(Frontier):
+    """Bucket queue khoá nguyên: `buckets[f][tie] -> {key: item}`.
+
+    Chỉ dùng khi `f` là số nguyên không âm (chi phí bước nguyên); `f` khác
+    (vd: `w * h` thực của A* có trọng số) bị từ chối bằng `ValueError` thay vì
+    bị cắt phần lẻ làm sai thứ tự bucket. Trong một
+    bucket ưu tiên `tie` nhỏ nhất (heap các `tie` xoá lười, nên `tie` có thể là
+    số nguyên hoặc tuple tuỳ ý), cùng `tie` thì LIFO (`dict.popitem`).
+    Push/pop/decrease-key đều O(1) khấu hao; bộ nhớ tỉ lệ với số nút đang sống.
+    """
+
+    name = "bucket"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._buckets: List[Optional[Dict[int, Dict[Hashable, object]]]] = []
+        self._tie_heaps: List[Optional[List[int]]] = []
+        self._where: Dict[Hashable, Tuple[int, int, object]] = {}
+        self._min_f = 0
+
+    def push(self, key: Hashable, item: object, f: int, tie: Tie = 0) -> None:
+        if f != int(f) or f < 0:
+            raise ValueError(f"Bucket frontier chỉ nhận f nguyên không âm, nhận {f!r}.")
+        f = int(f)
+        old = self._where.get(key)
+        if old is not None:
+            self._remove(key, old[0], old[1])
+            self.stale_avoided += 1
+
+        buckets = self._buckets
+        if f >= len(buckets):
+            grow = f + 1 - len(buckets)
+            buckets.extend([None] * grow)
+            self._tie_heaps.extend([None] * grow)
+
+        bucket = buckets[f]
+        if bucket is None:
+            bucket = buckets[f] = {}
+            self._tie_heaps[f] = []
+
+        slot = bucket.get(tie)
+        if slot is None:
+            slot = bucket[tie] = {}
+            heapq.heappush(self._tie_heaps[f], tie)
+        slot[key] = item
+        self._where[key] = (f, tie, item)
+        if f < self._min_f:
+            self._min_f = f
+
+    def _remove(self, key: Hashable, f: int, tie: Tie) -> None:
+        bucket = self._buckets[f]
+        slot = bucket[tie]
+        del slot[key]
+        if not slot:
+            del bucket[tie]
+            if not bucket:
+                self._drop(f)
+
+    def _drop(self, f: int) -> None:
+        """Bỏ bucket rỗng cùng heap `tie` của nó (tạo lại khi có push mới)."""
+        self._buckets[f] = None
+        self._tie_heaps[f] = None
+
+    def _min_tie(self, f: int) -> Tie:
+        bucket, ties = self._buckets[f], self._tie_heaps[f]
+        while ties[0] not in bucket:
+            heapq.heappop(ties)
+        return ties[0]
+
+    def peek_priority(self) -> Optional[int]:
+        if not self._where:
+            return None
+        buckets = self._buckets
+        f = self._min_f
+        while not buckets[f]:
+            f += 1
+        self._min_f = f
+        return f
+
+    def items(self) -> Iterator[Tuple[Hashable, object]]:
+        return ((key, entry[2]) for key, entry in self._where.items())
+
+    def pop(self) -> Tuple[Hashable, object]:
+        f = self.peek_priority()
+        if f is None:
+            raise IndexError("pop from empty frontier")
+
+        bucket = self._buckets[f]
+        tie = self._min_tie(f)
+        slot = bucket[tie]
+        key, item = slot.popitem()
+        if not slot:
+            del bucket[tie]
+            if not bucket:
+                self._drop(f)
+        del self._where[key]
+        return key, item
+
+    def get(self, key: Hashable) -> Optional[object]:
+        entry = self._where.get(key)
+        return None if entry is None else entry[2]
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+
+class IndexedHeapFrontier(Frontier):
+    """Heap nhị phân có chỉ mục vị trí, hỗ trợ decrease-key thật sự.
+
+    Mỗi phần tử heap là list `[f, tie, seq, key, item]` và được so sánh trực
+    tiếp `a < b`: `seq` duy nhất nên phép so sánh list dừng ở ba trường đầu,
+    chạy trong C, không gọi `Node.__lt__` hay hàm Python nào.
+    """
+
+    name = "indexed-heap"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._heap: List[list] = []
+        self._pos: Dict[Hashable, int] = {}
+        self._counter = 0
+
+    def _sift_up(self, index: int) -> None:
+        heap, pos = self._heap, self._pos
+        entry = heap[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            other = heap[parent]
+            if not entry < other:
+                break
+            heap[index] = other
+            pos[other[3]] = index
+            index = parent
+        heap[index] = entry
+        pos[entry[3]] = index
+
+    def _sift_down(self, index: int) -> None:
+        heap, pos = self._heap, self._pos
+        size = len(heap)
+        entry = heap[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            right = child + 1
+            if right < size and heap[right] < heap[child]:
+                child = right
+            if not heap[child] < entry:
+                break
+            heap[index] = heap[child]
+            pos[heap[index][3]] = index
+            index = child
+        heap[index] = entry
+        pos[entry[3]] = index
+
+    def push(self, key: Hashable, item: object, f: int, tie: Tie = 0) -> None:
+        self._counter += 1
+        index = self._pos.get(key)
+        if index is None:
+            self._heap.append([f, tie, self._counter, key, item])
+            self._sift_up(len(self._heap) - 1)
+            return
+
+        entry = self._heap[index]
+        self.stale_avoided += 1
+        decreased = (f, tie) < (entry[0], entry[1])
+        entry[0], entry[1], entry[2], entry[4] = f, tie, self._counter, item
+        if decreased:
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+
+    def pop(self) -> Tuple[Hashable, object]:
+        heap = self._heap
+        if not heap:
+            raise IndexError("pop from empty frontier")
+        top = heap[0]
+        last = heap.pop()
+        del self._pos[top[3]]
+        if heap:
+            heap[0] = last
+            self._sift_down(0)
+        return top[3], top[4]
+
+    def get(self, key: Hashable) -> Optional[object]:
+        index = self._pos.get(key)
+        return None if index is None else self._heap[index][4]
+
+    def peek_priority(self) -> Optional[int]:
+        return self._heap[0][0] if self._heap else None
+
+    def items(self) -> Iterator[Tuple[Hashable, object]]:
+        return ((entry[3], entry[4]) for entry in self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+FRONTIERS = {
+    "heap": HeapFrontier,
+    "bucket": BucketFrontier,
+    "indexed-heap": IndexedHeapFrontier,
+    "indexed": IndexedHeapFrontier,
+}
+
+
+def make_frontier(kind: str = "heap") -> Frontier:
+    """Tạo frontier theo tên (`heap`, `bucket`, `indexed-heap`)."""
+    cls = FRONTIERS.get(kind.lower())
+    if cls is None:
+        raise ValueError(f"Frontier '{kind}' không được hỗ trợ.")
+    return cls()
+
+
+__all__ = [
+    "Frontier",
+    "HeapFrontier",
+    "BucketFrontier",
+    "IndexedHeapFrontier",
+    "FRONTIERS",
+    "make_frontier",
+]
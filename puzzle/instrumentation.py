@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+import math
+import time
+import tracemalloc
+from typing import Dict, Iterable, List, Optional
+
+
+def _json_safe(value: object) -> object:
+    """Thay số không hữu hạn (vd: `h = inf` ở ngõ cụt) bằng `None` để JSON hợp chuẩn."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+class SearchInstrumentation:
+    """Hook đo đạc tuỳ chọn cho các engine A*.
+
+    Engine chỉ gọi hook khi được truyền vào (`instrumentation=None` thì gần như
+    không tốn chi phí). Thu thập:
+    - thời gian cộng dồn theo pha (`successors`, `heuristic`, `frontier`)
+    - số lần push, pop, pop bản cũ (stale) và mở lại nút (reopen)
+    - min/mean/max của heuristic theo độ sâu `g`
+    - bộ nhớ Python đỉnh qua `tracemalloc` (nếu `trace_memory=True`)
+    """
+
+    PHASES = ("successors", "heuristic", "frontier")
+
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.timings: Dict[str, float] = {phase: 0.0 for phase in self.PHASES}
+        self.counters: Dict[str, int] = {"pushes": 0, "pops": 0, "stale_pops": 0, "reopenings": 0}
+        self._by_depth: Dict[int, List[float]] = {}
+        self.peak_memory: Optional[int] = None
+        self.wall_time = 0.0
+        self._started = 0.0
+        self._owns_tracemalloc = False
+
+    def begin(self) -> None:
+        self._started = time.perf_counter()
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracemalloc = True
+            tracemalloc.reset_peak()
+
+    def end(self) -> None:
+        self.wall_time += time.perf_counter() - self._started
+        if self.trace_memory and tracemalloc.is_tracing():
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+                self._owns_tracemalloc = False
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_heuristics(self, depth: int, values: Iterable[float]) -> None:
+        entry = self._by_depth.get(depth)
+        for value in values:
+            if entry is None:
+                entry = self._by_depth[depth] = [0, 0.0, value, value]
+            entry[0] += 1
+            entry[1] += value
+            if value < entry[2]:
+                entry[2] = value
+            if value > entry[3]:
+                entry[3] = value
+
+    def heuristic_by_depth(self) -> List[Dict[str, float]]:
+        return [
+            {"depth": depth, "count": n, "min": low, "mean": total / n, "max": high}
+            for depth, (n, total, low, high) in sorted(self._by_depth.items())
+        ]
+
+    def to_dict(self) -> Dict[str, object]:
+        """Số liệu dạng dict; giá trị vô hạn/NaN thành `None`."""
+        return _json_safe({
+            "wall_time": self.wall_time,
+            "timings": dict(self.timings),
+            "counters": dict(self.counters),
+            "heuristic_by_depth": self.heuristic_by_depth(),
+            "peak_memory_bytes": self.peak_memory,
+        })
+
+    def to_json(self, search: Optional[Dict[str, object]] = None, **kwargs) -> str:
+        """JSON chuẩn (không có `Infinity`/`NaN`); `search` là thống kê engine, đặt lên đầu."""
+        data = self.to_dict()
+        if search is not None:
+            data = {"search": _json_safe(search), **data}
+        return json.dumps(data, allow_nan=False, **kwargs)
+
+
+__all__ = ["SearchInstrumentation"]
@@ -6,6 +6,34 @@ from models.state import State
 from models.action import Action
 
 
+# Tie-breaking among equal f_score nodes; the result goes into the heap key
+# (f, tie, counter) so ordering is a tuple comparison instead of Node.__lt__;
+# 'none' is handled by make_heap_entry so it keeps the original Node ordering
+TIE_BREAKERS = {
+    'none': lambda node, counter: 0,
+    'low-h': lambda node, counter: node.heuristic,
+    'high-g': lambda node, counter: -node.path_cost,
+    'lifo': lambda node, counter: -counter,
+}
+
+
+def make_tie_breaker(policy='none'):
+    """Return tie(node, counter) for a policy name or a key(state, g, h) function"""
+    if callable(policy):
+        return lambda node, counter: policy(node.state, node.path_cost, node.heuristic)
+    if policy not in TIE_BREAKERS:
+        raise ValueError(f"Unknown tie-breaking policy: {policy}")
+    return TIE_BREAKERS[policy]
+
+
+def make_heap_entry(policy='none'):
+    """Return entry(node, counter) for the heap; 'none' keeps the original Node ordering"""
+    if policy == 'none':
+        return lambda node, counter: (node.f_score, node)
+    tie = make_tie_breaker(policy)
+    return lambda node, counter: (node.f_score, tie(node, counter), counter, node)
+
+
 class Node:
     """Search tree node"""
     
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from array import array
+from typing import Dict, Hashable, List, Optional
+
+NO_PARENT = -1
+
+
+def _action_key(action: object) -> Hashable:
+    """Khoá intern cho hành động; `Action.payload` là dict nên không băm trực tiếp được."""
+    payload = getattr(action, "payload", None)
+    if payload is not None or not isinstance(action, Hashable):
+        return (
+            getattr(action, "type", None),
+            getattr(action, "pos1", None),
+            getattr(action, "pos2", None),
+            tuple(sorted(payload.items())) if payload else id(action),
+        )
+    return action
+
+
+class NodeStore:
+    """Kho nút dạng cột thay cho các đối tượng `Node` riêng lẻ.
+
+    Mỗi trạng thái được intern thành một id nguyên duy nhất; `g`, `h`, id cha
+    và mã hành động nằm trong các cột `array` song song (4 byte/ô, tự nâng
+    lên 8 byte hoặc số thực khi giá trị vượt phạm vi). Đường đi được dựng lại
+    từ cột cha, không cần chuỗi tham chiếu `parent`.
+    """
+
+    def __init__(self) -> None:
+        self.states: List[object] = []
+        self._ids: Dict[object, int] = {}
+        self.g = array("i")
+        self.h = array("i")
+        self.parent = array("i")
+        self.action = array("i")
+        self.closed = bytearray()
+        self._actions: List[object] = []
+        self._action_codes: Dict[Hashable, int] = {}
+
+    @classmethod
+    def from_columns(
+        cls,
+        states: List[object],
+        columns: Dict[str, array],
+        closed: bytearray,
+        actions: List[object],
+    ) -> "NodeStore":
+        """Dựng lại kho từ các cột đã lưu (dùng khi resume checkpoint)."""
+        store = cls()
+        store.states = states
+        store._ids = {state: node_id for node_id, state in enumerate(states)}
+        for name, column in columns.items():
+            setattr(store, name, column)
+        store.closed = closed
+        store._actions = list(actions)
+        store._action_codes = {_action_key(a): code for code, a in enumerate(store._actions)}
+        return store
+
+    @property
+    def actions(self) -> List[object]:
+        """Bảng hành động đã intern; mã trong cột `action` là chỉ số vào bảng này."""
+        return self._actions
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def get_id(self, state: object) -> Optional[int]:
+        return self._ids.get(state)
+
+    def add(self, state: object, g: float, h: float, parent: int = NO_PARENT, action: object = None) -> int:
+        """Intern một trạng thái mới và trả về id của nó."""
+        node_id = len(self.states)
+        self._ids[state] = node_id
+        self.states.append(state)
+        self.closed.append(0)
+        self._append("g", g)
+        self._append("h", h)
+        self._append("parent", parent)
+        self._append("action", self._action_code(action))
+        return node_id
+
+    def update(self, node_id: int, g: float, parent: int, action: object) -> None:
+        """Ghi đè đường đi tốt hơn tới một trạng thái đã có (giữ nguyên `h`)."""
+        self._set("g", node_id, g)
+        self.parent[node_id] = parent
+        self.action[node_id] = self._action_code(action)
+
+    def set_h(self, node_id: int, h: float) -> None:
+        """Ghi `h` mới (A* đánh giá heuristic lười: giá trị đầy đủ khi sắp mở rộng)."""
+        self._set("h", node_id, h)
+
+    def f(self, node_id: int) -> float:
+        return self.g[node_id] + self.h[node_id]
+
+    def get_path(self, node_id: int) -> List[object]:
+        path: List[object] = []
+        actions, parent = self._actions, self.parent
+        while parent[node_id] != NO_PARENT:
+            path.append(actions[self.action[node_id]])
+            node_id = parent[node_id]
+        path.reverse()
+        return path
+
+    def nbytes(self) -> int:
+        """Số byte của các cột số (không tính dict intern và bản thân trạng thái)."""
+        columns = (self.g, self.h, self.parent, self.action)
+        return sum(col.itemsize * len(col) for col in columns) + len(self.closed)
+
+    def _action_code(self, action: object) -> int:
+        if action is None:
+            return -1
+        key = _action_key(action)
+        code = self._action_codes.get(key)
+        if code is None:
+            code = self._action_codes[key] = len(self._actions)
+            self._actions.append(action)
+        return code
+
+    def _widen(self, name: str, value: float) -> array:
+        column = getattr(self, name)
+        typecode = "d" if isinstance(value, float) or column.typecode == "q" else "q"
+        widened = array(typecode, column)
+        setattr(self, name, widened)
+        return widened
+
+    def _append(self, name: str, value: float) -> None:
+        try:
+            getattr(self, name).append(value)
+        except (OverflowError, TypeError):
+            self._widen(name, value).append(value)
+
+    def _set(self, name: str, index: int, value: float) -> None:
+        try:
+            getattr(self, name)[index] = value
+        except (OverflowError, TypeError):
+            self._widen(name, value)[index] = value
+
+
+__all__ = ["NodeStore", "NO_PARENT"]
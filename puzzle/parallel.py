@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import math
+import multiprocessing as mp
+import queue
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .frontier import make_frontier
+from .search import Action, Heuristic, Problem
+
+NO_PARENT = (-1, -1)
+
+
+def _owner(state: object, workers: int) -> int:
+    return hash(state) % workers
+
+
+def _worker(
+    me: int,
+    workers: int,
+    problem: Problem,
+    heuristic: Heuristic,
+    frontier_kind: str,
+    inboxes: List[mp.Queue],
+    results: mp.Queue,
+    idle,
+    sent,
+    received,
+    incumbent,
+    goal_ref,
+    floors,
+    lock,
+    batch_size: int,
+    f_slack: float,
+) -> None:
+    """Vòng lặp của một worker HDA*: open/closed riêng, nhận/gửi successor qua queue."""
+    inbox = inboxes[me]
+    frontier = make_frontier(frontier_kind)
+    best: Dict[object, Tuple[int, int, int]] = {}
+    parents: List[Tuple[int, int]] = []
+    actions: List[Optional[Action]] = []
+    outgoing: List[list] = [[] for _ in range(workers)]
+    pending = 0
+    expanded = 0
+    max_open = 0
+
+    def insert(state: object, g: int, parent: Tuple[int, int], action: Optional[Action]) -> None:
+        previous = best.get(state)
+        if previous is not None and previous[0] <= g:
+            return
+        h = previous[2] if previous is not None else heuristic.calculate(state)
+        if h == math.inf:
+            return
+        node_id = len(parents)
+        parents.append(parent)
+        actions.append(action)
+        best[state] = (g, node_id, h)
+        if g + h < incumbent.value:
+            frontier.push(state, node_id, g + h, h)
+
+    def flush() -> None:
+        nonlocal pending
+        for owner, batch in enumerate(outgoing):
+            if batch:
+                sent[me] += 1
+                inboxes[owner].put(("batch", batch))
+                outgoing[owner] = []
+        pending = 0
+
+    def handle(message) -> bool:
+        kind = message[0]
+        if kind == "batch":
+            received[me] += 1
+            for state, g, parent, action in message[1]:
+                insert(state, g, parent, action)
+        elif kind == "trace":
+            node_id = message[1]
+            results.put(("trace", actions[node_id], parents[node_id]))
+        elif kind == "stop":
+            results.put(("stats", me, expanded, max_open))
+            return False
+        return True
+
+    while True:
+        top = frontier.peek_priority()
+        if top is None or top >= incumbent.value:
+            flush()
+            floors[me] = math.inf
+            idle[me] = 1
+            try:
+                message = inbox.get(timeout=0.005)
+            except queue.Empty:
+                continue
+            idle[me] = 0
+            if not handle(message):
+                return
+            continue
+
+        floors[me] = top
+        if top > min(floors) + f_slack:
+            flush()
+            try:
+                message = inbox.get(timeout=0.001)
+            except queue.Empty:
+                continue
+            if not handle(message):
+                return
+            continue
+
+        while True:
+            try:
+                message = inbox.get_nowait()
+            except queue.Empty:
+                break
+            if not handle(message):
+                return
+
+        max_open = max(max_open, len(frontier))
+        state, node_id = frontier.pop()
+        g = best[state][0]
+        expanded += 1
+
+        if problem.is_goal(state):
+            with lock:
+                if g < incumbent.value:
+                    incumbent.value = g
+                    goal_ref[0], goal_ref[1] = me, node_id
+            continue
+
+        for next_state, action, cost in problem.get_successors(state):
+            owner = _owner(next_state, workers)
+            if owner == me:
+                insert(next_state, g + cost, (me, node_id), action)
+            else:
+                outgoing[owner].append((next_state, g + cost, (me, node_id), action))
+                pending += 1
+        if pending >= batch_size:
+            flush()
+
+
+class ParallelAStar:
+    """A* song song kiểu HDA*: băm trạng thái để chọn tiến trình sở hữu.
+
+    Mỗi worker giữ open/closed riêng và trao đổi successor theo lô qua
+    `multiprocessing.Queue`. Worker công bố `f` nhỏ nhất của mình và chỉ mở
+    rộng nút có `f <= min_f_toàn_cục + f_slack`, tránh việc một worker đi quá
+    sâu khi các worker khác còn chậm (giảm search overhead). Lời giải vẫn tối ưu: worker cắt các nút có
+    `f >= incumbent`, và tiến trình chính chỉ kết thúc khi mọi worker rảnh và
+    số lô đã gửi bằng số lô đã nhận trong hai lần đọc liên tiếp.
+    `Problem`/`Heuristic` phải pickle được (hoặc dùng start method `fork`);
+    băm trạng thái phải ổn định giữa các tiến trình (với `spawn` cần cố định
+    `PYTHONHASHSEED`).
+    """
+
+    def __init__(
+        self,
+        problem: Problem,
+        heuristic: Heuristic,
+        workers: int = 4,
+        frontier: str = "heap",
+        batch_size: int = 64,
+        f_slack: float = 0,
+        start_method: Optional[str] = None,
+    ):
+        self.problem = problem
+        self.heuristic = heuristic
+        self.workers = max(1, workers)
+        self.frontier_kind = frontier
+        self.batch_size = batch_size
+        self.f_slack = f_slack
+        if start_method is None:
+            start_method = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+        self.start_method = start_method
+        self.stats: Dict[str, object] = {}
+
+    def search(self) -> Tuple[Optional[List[Action]], int, int, int]:
+        """Trả về (đường đi, chi phí, tổng số nút expanded, tổng open tối đa)."""
+        start = self.problem.initial_state
+        if self.problem.is_goal(start):
+            self.stats = {"expanded": 0, "frontier_max": 1, "workers": self.workers}
+            return [], 0, 0, 1
+
+        ctx = mp.get_context(self.start_method)
+        n = self.workers
+        inboxes = [ctx.Queue() for _ in range(n)]
+        results = ctx.Queue()
+        idle = ctx.Array("b", n, lock=False)
+        sent = ctx.Array("q", n + 1, lock=False)
+        received = ctx.Array("q", n, lock=False)
+        incumbent = ctx.Value("d", math.inf, lock=False)
+        goal_ref = ctx.Array("q", [-1, -1], lock=False)
+        floors = ctx.Array("d", [math.inf] * n, lock=False)
+        lock = ctx.Lock()
+
+        processes = [
+            ctx.Process(
+                target=_worker,
+                args=(
+                    i, n, self.problem, self.heuristic, self.frontier_kind,
+                    inboxes, results, idle, sent, received, incumbent, goal_ref,
+                    floors, lock, self.batch_size, self.f_slack,
+                ),
+                daemon=True,
+            )
+            for i in range(n)
+        ]
+        for process in processes:
+            process.start()
+
+        try:
+            sent[n] += 1
+            inboxes[_owner(start, n)].put(("batch", [(start, 0, NO_PARENT, None)]))
+            self._wait_for_quiescence(processes, idle, sent, received)
+
+            path: Optional[List[Action]] = None
+            cost = -1
+            if goal_ref[0] >= 0:
+                cost = int(incumbent.value)
+                path = []
+                ref = (goal_ref[0], goal_ref[1])
+                while ref != NO_PARENT:
+                    inboxes[ref[0]].put(("trace", ref[1]))
+                    _, action, parent = results.get()
+                    if action is not None:
+                        path.append(action)
+                    ref = tuple(parent)
+                path.reverse()
+
+            for inbox in inboxes:
+                inbox.put(("stop",))
+            expanded = 0
+            frontier_max = 0
+            for _ in range(n):
+                _, _, worker_expanded, worker_open = results.get()
+                expanded += worker_expanded
+                frontier_max += worker_open
+        finally:
+            for process in processes:
+                process.join(timeout=1)
+                if process.is_alive():
+                    process.terminate()
+
+        self.stats = {"expanded": expanded, "frontier_max": frontier_max, "workers": n}
+        return path, cost, expanded, frontier_max
+
+    @staticmethod
+    def _wait_for_quiescence(processes, idle, sent, received) -> None:
+        previous = None
+        while True:
+            time.sleep(0.002)
+            for process in processes:
+                if process.exitcode not in (None, 0):
+                    raise RuntimeError(f"Worker {process.name} dừng với mã {process.exitcode}.")
+            snapshot = (tuple(idle), sum(sent), sum(received))
+            quiet = all(snapshot[0]) and snapshot[1] == snapshot[2]
+            if quiet and snapshot == previous:
+                return
+            previous = snapshot if quiet else None
+
+
+__all__ = ["ParallelAStar"]
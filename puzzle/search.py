@@ -1,8 +1,18 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-import heapq
-from typing import Dict, List, Optional, Sequence, Tuple
+import math
+import os
+import time
+from typing import Dict, Hashable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .checkpoint import Checkpointer
+from .frontier import Frontier, make_frontier
+from .instrumentation import SearchInstrumentation
+from .nodestore import NodeStore
+from .tiebreak import TieKey, make_tie_breaker
+
+_DEAD_END = 2  # đánh dấu trong `refined`: `refine` trả `math.inf`, không mở rộng
 
 
 @dataclass(frozen=True)
@@ -66,66 +76,591 @@ class Problem:
     def get_successors(self, state: object) -> Sequence[Tuple[object, Action, int]]:  
         raise NotImplementedError
 
+    def dominance_key(self, state: object) -> Optional[Hashable]:
+        """Khoá nhóm trội (tuỳ chọn): chỉ các trạng thái cùng khoá mới được so bằng `dominates`.
+
+        `None` (mặc định) = không so trội; `AStar` chỉ dựng chỉ mục khi lớp con override.
+        """
+        return None
+
+    def dominates(self, a: object, b: object) -> bool:
+        """`a` trội `b`: từ `a` làm được mọi thứ `b` làm (tới đích với chi phí không lớn hơn).
+
+        Chỉ được gọi với hai trạng thái cùng `dominance_key`; khi `g(a) <= g(b)` thì `b` bị bỏ.
+        """
+        return False
+
+
+class DominanceIndex:
+    """Chỉ mục các nút trong `NodeStore` theo `Problem.dominance_key`.
+
+    Mỗi nhóm chỉ giữ các nút chưa bị nút khác trong nhóm trội; `dominated`
+    bỏ successor khi có nút cùng nhóm trội nó với `g` không lớn hơn.
+    `pruned` đếm số successor bị bỏ.
+    """
+
+    def __init__(self, problem: Problem, store: NodeStore):
+        self.problem = problem
+        self.store = store
+        self.pruned = 0
+        self._groups: Dict[Hashable, List[int]] = {}
+        for node_id in range(len(store)):
+            self.add(node_id)
+
+    def dominated(self, state: object, g: float) -> bool:
+        group = self._groups.get(self.problem.dominance_key(state))
+        if group:
+            states, g_column, dominates = self.store.states, self.store.g, self.problem.dominates
+            for other in group:
+                if g_column[other] <= g and states[other] != state and dominates(states[other], state):
+                    self.pruned += 1
+                    return True
+        return False
+
+    def add(self, node_id: int) -> None:
+        """Đưa nút (mới hoặc vừa giảm `g`) vào nhóm, bỏ các nút nó trội khỏi nhóm."""
+        store, dominates = self.store, self.problem.dominates
+        state, g = store.states[node_id], store.g[node_id]
+        key = self.problem.dominance_key(state)
+        if key is None:
+            return
+        group = self._groups.setdefault(key, [])
+        if node_id in group:
+            return
+        group[:] = [
+            other
+            for other in group
+            if not (g <= store.g[other] and dominates(state, store.states[other]))
+        ]
+        group.append(node_id)
+
 
 class Heuristic:
+    """Cận dưới chi phí tới đích.
+
+    Trả `math.inf` khi chắc chắn không tới được đích từ trạng thái (ngõ cụt):
+    các thuật toán tìm kiếm bỏ trạng thái đó thay vì đưa vào open.
+    """
+
     def calculate(self, state: object) -> int:  
         raise NotImplementedError
 
+    def calculate_batch(self, states: Sequence[object]) -> List[int]:
+        """Tính heuristic cho cả lô successor; mặc định gọi `calculate` từng trạng thái.
+
+        Lớp con có thể override để chia sẻ phần tính toán giữa các anh em.
+        """
+        return [self.calculate(state) for state in states]
+
+    def calculate_lazy_batch(self, states: Sequence[object]) -> List[int]:
+        """Phần rẻ của heuristic, dùng khi A* đánh giá lười (`lazy_heuristic=True`).
+
+        Mặc định là giá trị đầy đủ; lớp con trả cận dưới rẻ hơn và hoàn tất trong `refine`.
+        """
+        return self.calculate_batch(states)
+
+    def refine(self, state: object, h: int) -> int:
+        """Giá trị đầy đủ (>= `h`) khi nút sắp được mở rộng; mặc định giữ nguyên `h`."""
+        return h
+
     def name(self) -> str:
         return self.__class__.__name__
 
 
 class AStar:
-    """Thuật toán A* tổng quát"""
+    """Thuật toán A* tổng quát.
+
+    `frontier` chọn cấu trúc open list: `heap` (heapq xoá lười, mặc định),
+    `bucket` (bucket queue theo f nguyên) hoặc `indexed-heap` (decrease-key).
+    Sau mỗi lần `search()`, `self.stats` chứa các bộ đếm của lần chạy đó.
+    `instrumentation` (tuỳ chọn) nhận thời gian theo pha và các bộ đếm chi tiết.
+    Nút được lưu trong `NodeStore` dạng cột (mỗi trạng thái một id nguyên);
+    `self.store` giữ kho của lần chạy gần nhất.
+    `checkpoint` (một `Checkpointer`) ghi snapshot định kỳ; `resume_from` là
+    đường dẫn snapshot để tiếp tục một lần tìm kiếm bị ngắt.
+    `tie_breaking` chọn thứ tự giữa các nút cùng `f` (xem `make_tie_breaker`):
+    `none` (mặc định, chỉ theo `f`), `low-h`, `high-g`, `lifo` hoặc hàm
+    `key(state, g, h)`.
+    `lazy_heuristic=True`: khi sinh nút chỉ tính `calculate_lazy_batch` (phần
+    rẻ); lần đầu nút được pop mới gọi `refine` và đẩy lại nếu `f` tăng (Lazy A*).
+    Bản đẩy cũ có `f` thấp hơn `g + h` đã lưu bị bỏ khi pop, kể cả khi frontier
+    không tự loại nó (`stats["heuristic_superseded"]`).
+    Trạng thái có heuristic `math.inf` không được lưu/đẩy (`stats["dead_ends"]`).
+    Nếu `problem` override `dominance_key`/`dominates` và `dominance=True` (mặc định tắt),
+    successor bị một nút đã sinh trội với `g` không lớn hơn thì bị bỏ ngay khi
+    sinh, trước khi tính heuristic (`stats["dominated"]`).
+    """
 
-    def __init__(self, problem: Problem, heuristic: Heuristic):
+    def __init__(
+        self,
+        problem: Problem,
+        heuristic: Heuristic,
+        frontier: str = "heap",
+        instrumentation: Optional[SearchInstrumentation] = None,
+        checkpoint: Optional[Checkpointer] = None,
+        resume_from: Optional[str] = None,
+        tie_breaking: Union[str, TieKey] = "none",
+        lazy_heuristic: bool = False,
+        dominance: bool = False,
+    ):
         self.problem = problem
         self.heuristic = heuristic
+        self.frontier_kind = frontier
+        self.tie_breaking = tie_breaking
+        self.lazy_heuristic = lazy_heuristic
+        self.dominance = dominance and type(problem).dominance_key is not Problem.dominance_key
+        self.instrumentation = instrumentation
+        self.checkpoint = checkpoint
+        self.resume_from = resume_from
+        self.store: Optional[NodeStore] = None
+        self.stats: Dict[str, int] = {}
+
+    def _record(self, frontier: Frontier, expanded: int, max_frontier_size: int, dead_ends: int = 0) -> None:
+        self.stats = {
+            "expanded": expanded,
+            "frontier_max": max_frontier_size,
+            "stale_avoided": frontier.stale_avoided,
+            "stale_popped": frontier.stale_popped,
+            "dead_ends": dead_ends,
+        }
+        instr = self.instrumentation
+        if instr is not None:
+            instr.count("stale_pops", frontier.stale_popped)
+            instr.end()
 
     def search(self) -> Tuple[Optional[List[Action]], int, int, int]:
         """Trả về (đường đi, chi phí, số nút expanded, frontier tối đa)."""
-        if self.problem.is_goal(self.problem.initial_state):
-            return [], 0, 0, 1
-
-        initial_h = self.heuristic.calculate(self.problem.initial_state)
-        initial_node = Node(self.problem.initial_state, None, None, 0, initial_h)
-
-        frontier: List[Node] = []
-        heapq.heappush(frontier, initial_node)
-        frontier_lookup = {self.problem.initial_state: initial_node}
-        explored: Dict[object, int] = {}
-        max_frontier_size = 1
+        instr = self.instrumentation
+        clock = time.perf_counter
+        if instr is not None:
+            instr.begin()
+
+        frontier = make_frontier(self.frontier_kind)
+        tie_key = make_tie_breaker(self.tie_breaking)
+        checkpoint = self.checkpoint
+        if self.resume_from is not None:
+            loader = checkpoint if checkpoint is not None else Checkpointer(self.resume_from)
+            store, frontier_ids, counters = loader.load(self.resume_from)
+            if checkpoint is not None and checkpoint.path != os.fspath(self.resume_from):
+                checkpoint.start_fresh()
+            for node_id in frontier_ids:
+                g, h = store.g[node_id], store.h[node_id]
+                frontier.push(node_id, node_id, g + h, tie_key(store.states[node_id], g, h, node_id))
+            expanded = counters.get("expanded", 0)
+            max_frontier_size = counters.get("frontier_max", len(frontier))
+        else:
+            if self.problem.is_goal(self.problem.initial_state):
+                self._record(frontier, 0, 1)
+                self._record_lazy(0, 0)
+                self._record_dominance(None)
+                return [], 0, 0, 1
+
+            if checkpoint is not None:
+                checkpoint.start_fresh()
+            store = NodeStore()
+            initial_h = self.heuristic.calculate(self.problem.initial_state)
+            if initial_h == math.inf:
+                self._record(frontier, 0, 1, 1)
+                self._record_lazy(0, 0)
+                self._record_dominance(None)
+                return None, -1, 0, 1
+            root = store.add(self.problem.initial_state, 0, initial_h)
+            frontier.push(root, root, initial_h, tie_key(self.problem.initial_state, 0, initial_h, 0))
+            expanded = 0
+            max_frontier_size = 1
+            if instr is not None:
+                instr.count("pushes")
+                instr.record_heuristics(0, (initial_h,))
+
+        self.store = store
+        g_column, h_column, closed = store.g, store.h, store.closed
+        seq = len(store)
+        lazy = self.lazy_heuristic
+        refined = bytearray()
+        refinements = repushed = dead_ends = superseded = 0
+        dominance = DominanceIndex(self.problem, store) if self.dominance else None
 
         while frontier:
             max_frontier_size = max(max_frontier_size, len(frontier))
-            current_node = heapq.heappop(frontier)
-            state = current_node.state
-            frontier_lookup.pop(state, None)
+            if lazy:
+                popped_f = frontier.peek_priority()
+            if instr is not None:
+                started = clock()
+                node_id, _ = frontier.pop()
+                instr.add_time("frontier", clock() - started)
+                instr.count("pops")
+            else:
+                node_id, _ = frontier.pop()
+            state = store.states[node_id]
+            path_cost = g_column[node_id]
+            if lazy and popped_f < path_cost + h_column[node_id]:
+                superseded += 1  # bản đẩy trước khi `refine` nâng `h`; bản mới vẫn trong open
+                continue
 
             if self.problem.is_goal(state):
-                return (
-                    current_node.get_path(),
-                    current_node.path_cost,
-                    len(explored),
-                    max_frontier_size,
-                )
-
-            explored[state] = current_node.path_cost
-
+                self._record(frontier, expanded, max_frontier_size, dead_ends)
+                self._record_lazy(refinements, repushed, superseded)
+                self._record_dominance(dominance)
+                return store.get_path(node_id), path_cost, expanded, max_frontier_size
+
+            if lazy:
+                if node_id >= len(refined):
+                    refined.extend(bytes(len(store) - len(refined)))
+                if refined[node_id] == _DEAD_END:
+                    continue
+                if not refined[node_id] and not closed[node_id]:
+                    refined[node_id] = 1
+                    refinements += 1
+                    h = h_column[node_id]
+                    if instr is not None:
+                        started = clock()
+                        full = self.heuristic.refine(state, h)
+                        instr.add_time("heuristic", clock() - started)
+                    else:
+                        full = self.heuristic.refine(state, h)
+                    if full == math.inf:
+                        refined[node_id] = _DEAD_END
+                        dead_ends += 1
+                        continue
+                    if full > h:
+                        store.set_h(node_id, full)
+                        h_column = store.h
+                        seq += 1
+                        frontier.push(node_id, node_id, path_cost + full, tie_key(state, path_cost, full, seq))
+                        repushed += 1
+                        continue
+
+            if not closed[node_id]:
+                closed[node_id] = 1
+                expanded += 1
+                if checkpoint is not None and checkpoint.due(expanded):
+                    ids = [node_id] + [key for key, _ in frontier.items()]
+                    checkpoint.save(store, ids, {"expanded": expanded, "frontier_max": max_frontier_size})
+
+            if instr is not None:
+                started = clock()
+            improved: List[int] = []
+            fresh = []
             for next_state, action, cost in self.problem.get_successors(state):
-                new_cost = current_node.path_cost + cost
-                if next_state in explored and explored[next_state] <= new_cost:
+                new_cost = path_cost + cost
+                next_id = store.get_id(next_state)
+                if next_id is not None and new_cost >= g_column[next_id]:
+                    continue
+                if dominance is not None and dominance.dominated(next_state, new_cost):
                     continue
+                if next_id is None:
+                    fresh.append((next_state, action, new_cost))
+                else:
+                    store.update(next_id, new_cost, node_id, action)
+                    g_column = store.g
+                    improved.append(next_id)
+                    if dominance is not None:
+                        dominance.add(next_id)
+            if instr is not None:
+                instr.add_time("successors", clock() - started)
+
+            if fresh:
+                evaluate = self.heuristic.calculate_lazy_batch if lazy else self.heuristic.calculate_batch
+                if instr is not None:
+                    started = clock()
+                    heuristics = evaluate([c[0] for c in fresh])
+                    instr.add_time("heuristic", clock() - started)
+                    for (_, _, new_cost), heuristic_cost in zip(fresh, heuristics):
+                        instr.record_heuristics(new_cost, (heuristic_cost,))
+                else:
+                    heuristics = evaluate([c[0] for c in fresh])
+                for (next_state, action, new_cost), heuristic_cost in zip(fresh, heuristics):
+                    next_id = store.get_id(next_state)
+                    if next_id is None:
+                        if heuristic_cost == math.inf:
+                            dead_ends += 1
+                            continue
+                        next_id = store.add(next_state, new_cost, heuristic_cost, node_id, action)
+                    elif new_cost < store.g[next_id]:
+                        store.update(next_id, new_cost, node_id, action)
+                    else:
+                        continue
+                    improved.append(next_id)
+                    if dominance is not None:
+                        dominance.add(next_id)
+                g_column, h_column = store.g, store.h
+
+            if instr is not None:
+                started = clock()
+            for next_id in dict.fromkeys(improved):
+                seq += 1
+                new_cost, heuristic_cost = g_column[next_id], h_column[next_id]
+                tie = tie_key(store.states[next_id], new_cost, heuristic_cost, seq)
+                frontier.push(next_id, next_id, new_cost + heuristic_cost, tie)
+                if instr is not None:
+                    instr.count("pushes")
+                    if closed[next_id]:
+                        instr.count("reopenings")
+            if instr is not None:
+                instr.add_time("frontier", clock() - started)
+
+        self._record(frontier, expanded, max_frontier_size, dead_ends)
+        self._record_lazy(refinements, repushed, superseded)
+        self._record_dominance(dominance)
+        return None, -1, expanded, max_frontier_size
+
+    def _record_lazy(self, refinements: int, repushed: int, superseded: int = 0) -> None:
+        if self.lazy_heuristic:
+            self.stats["heuristic_refined"] = refinements
+            self.stats["heuristic_repushed"] = repushed
+            self.stats["heuristic_superseded"] = superseded
+
+    def _record_dominance(self, dominance: Optional[DominanceIndex]) -> None:
+        if self.dominance:
+            self.stats["dominated"] = dominance.pruned if dominance is not None else 0
+
+
+class AnytimeAStar(AStar):
+    """A* có trọng số theo kiểu anytime (ARA*) với ngân sách thời gian/số nút.
+
+    Bắt đầu với `initial_weight` cao để có lời giải sớm, sau đó giảm trọng số
+    `weight_step` mỗi vòng và tái sử dụng open/closed (danh sách INCONS) để cải
+    thiện lời giải cho tới khi hết `time_limit` (giây) hoặc `max_expansions`.
+    `self.stats["bound"]` là cận sub-optimal đạt được (1.0 = tối ưu).
+    """
+
+    KEY_SCALE = 100
+
+    def __init__(
+        self,
+        problem: Problem,
+        heuristic: Heuristic,
+        frontier: str = "bucket",
+        initial_weight: float = 3.0,
+        weight_step: float = 0.5,
+        time_limit: Optional[float] = None,
+        max_expansions: Optional[int] = None,
+        tie_breaking: Union[str, TieKey] = "none",
+    ):
+        super().__init__(problem, heuristic, frontier=frontier, tie_breaking=tie_breaking)
+        self.initial_weight = max(1.0, initial_weight)
+        self.weight_step = weight_step
+        self.time_limit = time_limit
+        self.max_expansions = max_expansions
+
+    def _key(self, node: Node, weight: float) -> int:
+        return int(round((node.path_cost + weight * node.heuristic) * self.KEY_SCALE))
+
+    @staticmethod
+    def _lower_bound(frontier: Frontier, incons: Dict[object, Node]) -> float:
+        """min(g + h) trên OPEN ∪ INCONS: cận dưới của chi phí tối ưu."""
+        lower = min((n.path_cost + n.heuristic for _, n in frontier.items()), default=math.inf)
+        return min(lower, min((n.path_cost + n.heuristic for n in incons.values()), default=math.inf))
+
+    def improve(self) -> Iterator[Tuple[List[Action], int, float]]:
+        """Sinh lần lượt các lời giải `(path, cost, bound)` ngày càng tốt."""
+        start = self.problem.initial_state
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        self.stats = {"expanded": 0, "frontier_max": 1, "solutions": 0, "bound": math.inf}
+
+        if self.problem.is_goal(start):
+            self.stats["bound"] = 1.0
+            yield [], 0, 1.0
+            return
+
+        weight = self.initial_weight
+        root = Node(start, None, None, 0, self.heuristic.calculate(start))
+        if root.heuristic == math.inf:
+            return
+        best: Dict[object, Node] = {start: root}
+        closed: set = set()
+        incons: Dict[object, Node] = {}
+        tie_key = make_tie_breaker(self.tie_breaking)
+        seq = 0
+        frontier = make_frontier(self.frontier_kind)
+        frontier.push(start, root, self._key(root, weight), tie_key(start, 0, root.heuristic, seq))
+        incumbent: Optional[Node] = None
+        published: Optional[Node] = None
+        expanded = 0
+        max_frontier_size = 1
+
+        while True:
+            self.stats["weight"] = weight
+            limit = math.inf if incumbent is None else incumbent.path_cost * self.KEY_SCALE
+            while frontier:
+                top = frontier.peek_priority()
+                if top is None or top >= limit:
+                    break
+                if (
+                    self.max_expansions is not None and expanded >= self.max_expansions
+                ) or (deadline is not None and time.perf_counter() >= deadline):
+                    if incumbent is not None and incumbent is not published:
+                        ratio = incumbent.path_cost / max(self._lower_bound(frontier, incons), 1)
+                        self.stats["solutions"] += 1
+                        self.stats["bound"] = min(self.stats["bound"], max(ratio, 1.0))
+                        yield incumbent.get_path(), incumbent.path_cost, self.stats["bound"]
+                    return
+
+                max_frontier_size = max(max_frontier_size, len(frontier))
+                state, node = frontier.pop()
+                closed.add(state)
+                expanded += 1
+                self.stats["expanded"] = expanded
+                self.stats["frontier_max"] = max_frontier_size
+
+                for next_state, action, cost in self.problem.get_successors(state):
+                    new_cost = node.path_cost + cost
+                    previous = best.get(next_state)
+                    if previous is not None and previous.path_cost <= new_cost:
+                        continue
+                    h = previous.heuristic if previous is not None else self.heuristic.calculate(next_state)
+                    if h == math.inf:
+                        continue
+                    child = Node(next_state, node, action, new_cost, h)
+                    best[next_state] = child
+
+                    if self.problem.is_goal(next_state):
+                        if incumbent is None or new_cost < incumbent.path_cost:
+                            incumbent = child
+                            limit = new_cost * self.KEY_SCALE
+                        continue
+                    if next_state in closed:
+                        incons[next_state] = child
+                    else:
+                        seq += 1
+                        frontier.push(next_state, child, self._key(child, weight), tie_key(next_state, new_cost, h, seq))
+
+            if incumbent is None:
+                self.stats["bound"] = math.inf
+                return
+
+            lower = self._lower_bound(frontier, incons)
+            bound = 1.0 if lower >= incumbent.path_cost else min(weight, incumbent.path_cost / max(lower, 1))
+            bound = self.stats["bound"] = min(bound, self.stats["bound"])
+            if incumbent is not published:
+                published = incumbent
+                self.stats["solutions"] += 1
+                yield incumbent.get_path(), incumbent.path_cost, bound
+
+            if bound <= 1.0 or weight <= 1.0:
+                return
+
+            weight = max(1.0, weight - self.weight_step)
+            pending = list(frontier.items()) + list(incons.items())
+            frontier = make_frontier(self.frontier_kind)
+            for state, node in pending:
+                seq += 1
+                tie = tie_key(state, node.path_cost, node.heuristic, seq)
+                frontier.push(state, node, self._key(node, weight), tie)
+            incons.clear()
+            closed.clear()
+
+    def search(self) -> Tuple[Optional[List[Action]], int, int, int]:
+        """Trả về lời giải tốt nhất tìm được trong ngân sách (cùng bộ kết quả với AStar)."""
+        result: Tuple[Optional[List[Action]], int] = (None, -1)
+        for path, cost, _ in self.improve():
+            result = (path, cost)
+        return result[0], result[1], self.stats["expanded"], self.stats["frontier_max"]
 
-                heuristic_cost = self.heuristic.calculate(next_state)
-                child = Node(next_state, current_node, action, new_cost, heuristic_cost)
 
-                existing = frontier_lookup.get(next_state)
-                if existing is None or child.f_score < existing.f_score:
-                    frontier_lookup[next_state] = child
-                    heapq.heappush(frontier, child)
+class IDAStar:
+    """IDA* dùng chung interface `Problem`/`Heuristic` với `AStar`.
 
-        return None, -1, len(explored), max_frontier_size
+    Bộ nhớ chỉ tăng theo độ sâu lời giải: DFS lặp với ngưỡng `f`, chống chu
+    trình trên đường đi hiện tại. `table_size > 0` bật bảng chuyển vị (g nhỏ
+    nhất đã gặp trong vòng lặp hiện tại), giới hạn số entry, bỏ entry cũ nhất.
+    """
 
+    def __init__(self, problem: Problem, heuristic: Heuristic, table_size: int = 0):
+        self.problem = problem
+        self.heuristic = heuristic
+        self.table_size = table_size
+        self.stats: Dict[str, int] = {}
+
+    def _children(self, state: object, g: int) -> List[Tuple[int, int, object, Action, int]]:
+        successors = self.problem.get_successors(state)
+        heuristics = self.heuristic.calculate_batch([s for s, _, _ in successors])
+        children = []
+        for (next_state, action, cost), h in zip(successors, heuristics):
+            if h == math.inf:
+                continue
+            new_cost = g + cost
+            children.append((new_cost + h, h, next_state, action, new_cost))
+        children.sort(key=lambda child: (child[0], child[1]))
+        return children
 
-__all__ = ["Action", "Node", "Problem", "Heuristic", "AStar"]
+    def search(self) -> Tuple[Optional[List[Action]], int, int, int]:
+        """Trả về (đường đi, chi phí, số nút expanded, độ sâu stack tối đa)."""
+        start = self.problem.initial_state
+        if self.problem.is_goal(start):
+            self.stats = {"expanded": 0, "frontier_max": 1, "iterations": 0}
+            return [], 0, 0, 1
+
+        bound = self.heuristic.calculate(start)
+        if bound == math.inf:
+            self.stats = {"expanded": 0, "frontier_max": 1, "iterations": 0}
+            return None, -1, 0, 1
+        expanded = 0
+        max_depth = 1
+        iterations = 0
+        table: Dict[object, int] = {}
+
+        while True:
+            iterations += 1
+            table.clear()
+            next_bound: Optional[int] = None
+
+            path_states: List[object] = [start]
+            on_path = {start}
+            actions: List[Action] = []
+            stack = [iter(self._children(start, 0))]
+            expanded += 1
+
+            while stack:
+                child = next(stack[-1], None)
+                if child is None:
+                    stack.pop()
+                    on_path.discard(path_states.pop())
+                    if actions:
+                        actions.pop()
+                    continue
+
+                f_score, _, next_state, action, new_cost = child
+                if f_score > bound:
+                    if next_bound is None or f_score < next_bound:
+                        next_bound = f_score
+                    continue
+                if next_state in on_path:
+                    continue
+                if self.table_size > 0:
+                    seen = table.get(next_state)
+                    if seen is not None and seen <= new_cost:
+                        continue
+                    if seen is None and len(table) >= self.table_size:
+                        del table[next(iter(table))]
+                    table[next_state] = new_cost
+
+                if self.problem.is_goal(next_state):
+                    max_depth = max(max_depth, len(path_states) + 1)
+                    self.stats = {
+                        "expanded": expanded,
+                        "frontier_max": max_depth,
+                        "iterations": iterations,
+                        "threshold": bound,
+                    }
+                    return actions + [action], new_cost, expanded, max_depth
+
+                path_states.append(next_state)
+                on_path.add(next_state)
+                actions.append(action)
+                stack.append(iter(self._children(next_state, new_cost)))
+                expanded += 1
+                max_depth = max(max_depth, len(path_states))
+
+            if next_bound is None:
+                self.stats = {
+                    "expanded": expanded,
+                    "frontier_max": max_depth,
+                    "iterations": iterations,
+                    "threshold": bound,
+                }
+                return None, -1, expanded, max_depth
+            bound = next_bound
+
+
+__all__ = ["Action", "Node", "Problem", "Heuristic", "DominanceIndex", "AStar", "AnytimeAStar", "IDAStar"]
@@ -1,6 +1,6 @@
 """
 Tests package
 """
-from tests.test_cases import TestCases
+from .test_cases import TestCases
 
 __all__ = ['TestCases']
\ No newline at end of file
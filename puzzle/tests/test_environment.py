@@ -0,0 +1,42 @@
+"""`PacmanState.phase` bị chặn: quay vòng theo lịch, trạng thái lặp lại thì bằng nhau."""
+
+from __future__ import annotations
+
+from pacman.environment import PacmanEnvironment, PacmanProblem
+
+# Không có ma: Pacman đứng yên (`Stop`) thì chỉ thời gian và góc quay thay đổi.
+LAYOUT = [
+    "%%%%%%",
+    "%P. E%",
+    "%    %",
+    "%%%%%%",
+]
+
+
+def _stop(problem: PacmanProblem, state):
+    return next(s for s, a, _ in problem.get_successors(state) if a.type == "Stop")
+
+
+def test_phase_follows_the_schedule():
+    environment = PacmanEnvironment(LAYOUT)
+    problem = PacmanProblem(environment)
+    period = environment.ROTATION_PERIOD
+    state = environment.initial_state
+    for step in range(1, 4 * period + 1):
+        state = _stop(problem, state)
+        assert state.phase == step % (4 * period)  # không có ma: lịch dài đúng 4 lần quay
+        assert state.layout_index == step // period % 4
+
+
+def test_states_differing_only_in_time_are_equal():
+    environment = PacmanEnvironment(LAYOUT)
+    problem = PacmanProblem(environment)
+    start = environment.initial_state
+    state = _stop(problem, start)
+    assert state != start
+
+    # Sau bốn lần quay (4 * ROTATION_PERIOD bước) cấu hình trùng hẳn trạng thái đầu.
+    for _ in range(4 * environment.ROTATION_PERIOD - 1):
+        state = _stop(problem, state)
+    assert state == start and hash(state) == hash(start)
+    assert len({start, state}) == 1
@@ -0,0 +1,133 @@
+"""Heuristic Pacman phải admissible: `h(s)` không vượt chi phí còn lại thật ở mọi trạng thái đạt được."""
+
+from __future__ import annotations
+
+import random
+from collections import deque
+from typing import Dict, List, Optional
+
+import pytest
+
+from pacman.environment import PacmanEnvironment, PacmanProblem, PacmanState
+from pacman.heuristics import (
+    CombinedHeuristic,
+    ExactDistanceHeuristic,
+    ExactMSTHeuristic,
+    FoodMSTHeuristic,
+    FoodTourHeuristic,
+    GhostDistanceHeuristic,
+    PieAwareHeuristic,
+)
+from puzzle import AStar
+
+HEURISTICS = {
+    "pie": PieAwareHeuristic,
+    "mst": FoodMSTHeuristic,
+    "exact": ExactDistanceHeuristic,
+    "exact-mst": ExactMSTHeuristic,
+    "tour": FoodTourHeuristic,
+    "combined": CombinedHeuristic,
+}
+
+
+class QuickRotationEnvironment(PacmanEnvironment):
+    """Quay sau mỗi 5 bước: lịch ngắn hơn nên duyệt hết trạng thái nhanh, và quay thường xuyên hơn."""
+
+    ROTATION_PERIOD = 5
+
+
+def _random_layout(rng: random.Random, height: int, width: int) -> Optional[List[str]]:
+    """Tường ngẫu nhiên (có thể có viền), tối đa 3 food, 2 pie và 2 ma."""
+    grid = [["%" if rng.random() < 0.3 else " " for _ in range(width)] for _ in range(height)]
+    if rng.random() < 0.5:
+        for row in grid:
+            row[0] = row[-1] = "%"
+        grid[0] = grid[-1] = ["%"] * width
+    free = [(r, c) for r in range(height) for c in range(width) if grid[r][c] == " "]
+    if len(free) < 8:
+        return None
+    rng.shuffle(free)
+    marks = ["P", "E"] + ["."] * rng.randint(0, 3)
+    marks += [" "] * (5 - len(marks)) + ["O"] * rng.randint(0, 2)
+    marks += [" "] * (7 - len(marks))
+    if rng.random() < 0.5:
+        marks += ["G"] * rng.randint(1, 2)
+    for (r, c), mark in zip(free, marks):
+        grid[r][c] = mark
+    return ["".join(row) for row in grid]
+
+
+def _cost_to_go(problem: PacmanProblem) -> Dict[PacmanState, int]:
+    """BFS mọi trạng thái đạt được, rồi BFS ngược từ các đích: chi phí còn lại chính xác."""
+    start = problem.initial_state
+    predecessors: Dict[PacmanState, List[PacmanState]] = {start: []}
+    queue = deque([start])
+    while queue:
+        state = queue.popleft()
+        for successor, _, _ in problem.get_successors(state):
+            if successor not in predecessors:
+                predecessors[successor] = []
+                queue.append(successor)
+            predecessors[successor].append(state)
+
+    dist = {state: 0 for state in predecessors if problem.is_goal(state)}
+    queue = deque(dist)
+    while queue:
+        state = queue.popleft()
+        for previous in predecessors[state]:
+            if previous not in dist:
+                dist[previous] = dist[state] + 1
+                queue.append(previous)
+    return dist
+
+
+def _check_admissible(lines: List[str], environment_class: type = PacmanEnvironment) -> None:
+    env = environment_class(lines)
+    problem = PacmanProblem(env)
+    dist = _cost_to_go(problem)
+    cost = dist.get(env.initial_state, -1)
+    heuristics = {name: cls(env) for name, cls in HEURISTICS.items()}
+    if env.layouts[0].ghost_starts:
+        heuristics["ghost"] = GhostDistanceHeuristic(env)
+
+    for name, heuristic in heuristics.items():
+        result = AStar(PacmanProblem(env), heuristic, frontier="bucket", tie_breaking="low-h").search()
+        assert result[1] == cost, (name, lines)
+    for state, remaining in dist.items():
+        for name, heuristic in heuristics.items():
+            assert heuristic.calculate(state) <= remaining, (name, state, remaining, lines)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_random_layouts_admissible(seed):
+    rng = random.Random(seed)
+    checked = 0
+    while checked < 8:
+        lines = _random_layout(rng, rng.randint(4, 7), rng.randint(4, 8))
+        if lines is not None:
+            _check_admissible(lines, QuickRotationEnvironment)
+            checked += 1
+
+
+def test_exact_distance_splits_on_pies():
+    # Đi qua pie rồi xuyên tường ngắn hơn đường theo metric có tường.
+    _check_admissible(["%%    ", ".O  %%", "%  ..%", "P %E%%"])
+
+
+def test_wall_standing_state_with_pies_left():
+    # pie_timer = 0 trên ô tường (0, 3) khi còn hai pie: trước đây h = 6 > 5.
+    _check_admissible(["%O.%", "% % ", "O P%", "%% %", "%%E%"])
+
+
+def test_teleport_onto_wall_corner():
+    # Góc (0, 0) và (7, 14) là tường: teleport lên đó rồi bước ra được cả khi không có pie.
+    _check_admissible([
+        "%      %%  %   ",
+        "%   .%         ",
+        "%  %  E %   % %",
+        "%   %%  %P%  % ",
+        " % % %   %   %%",
+        ". % % %%   % % ",
+        "%  %%%%    % %%",
+        "  %      %  . %",
+    ])
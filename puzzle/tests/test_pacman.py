@@ -0,0 +1,188 @@
+"""Chi phí tối ưu của Pacman cố định qua mọi cấu hình tìm kiếm; artifact layout, resume."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from pacman.auto import run_auto_mode
+from pacman.environment import PacmanEnvironment, PacmanProblem
+from pacman.heuristics import CombinedHeuristic, FoodTourHeuristic
+from pacman.main import DEFAULT_LAYOUT
+from puzzle import AStar, ExternalAStar, ParallelAStar
+from puzzle.checkpoint import Checkpointer
+
+LAYOUT_DIR = Path(__file__).resolve().parents[2] / "pacman" / "layouts"
+COSTS = {"default": 13, "small_basic": 7, "maze": 145}
+KINDS = ["heap", "bucket", "indexed-heap"]
+
+
+def _layout(name: str) -> List[str]:
+    if name == "default":
+        return DEFAULT_LAYOUT
+    return (LAYOUT_DIR / f"{name}.txt").read_text(encoding="utf-8").splitlines()
+
+
+def _replay(environment: PacmanEnvironment, path) -> int:
+    """Đi lại `path` bằng bước đơn; trả số bước (trạng thái cuối phải là đích)."""
+    problem = PacmanProblem(environment)
+    state = environment.initial_state
+    for action in path:
+        state = next(s for s, a, _ in problem.get_successors(state) if a == action)
+    assert problem.is_goal(state)
+    return len(path)
+
+
+@pytest.fixture(scope="module")
+def environments():
+    return {name: PacmanEnvironment(_layout(name)) for name in COSTS}
+
+
+@pytest.mark.parametrize("name", ["default", "small_basic"])
+@pytest.mark.parametrize("kind", KINDS)
+@pytest.mark.parametrize("tie_breaking", ["none", "low-h", "high-g", "lifo"])
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("dominance", [False, True])
+def test_small_layout_costs(environments, name, kind, tie_breaking, lazy, dominance):
+    environment = environments[name]
+    solver = AStar(
+        PacmanProblem(environment),
+        CombinedHeuristic(environment),
+        frontier=kind,
+        tie_breaking=tie_breaking,
+        lazy_heuristic=lazy,
+        dominance=dominance,
+    )
+    path, cost, _, _ = solver.search()
+    assert cost == COSTS[name]
+    assert _replay(environment, path) == cost
+
+
+@pytest.mark.parametrize("name", ["default", "small_basic", "maze"])
+@pytest.mark.parametrize("macros", [False, True])
+def test_macro_costs(environments, name, macros):
+    environment = environments[name]
+    problem = PacmanProblem(environment, macros=macros)
+    path, cost, _, _ = AStar(problem, FoodTourHeuristic(environment), frontier="bucket", tie_breaking="low-h", dominance=True).search()
+    assert cost == COSTS[name]
+    assert _replay(environment, problem.expand_path(path)) == cost
+
+
+@pytest.mark.parametrize(
+    "kind, tie_breaking, lazy",
+    [("heap", "low-h", False), ("bucket", "none", False), ("indexed-heap", "high-g", False), ("bucket", "low-h", True)],
+)
+def test_maze_cost(environments, kind, tie_breaking, lazy):
+    environment = environments["maze"]
+    solver = AStar(
+        PacmanProblem(environment),
+        CombinedHeuristic(environment),
+        frontier=kind,
+        tie_breaking=tie_breaking,
+        lazy_heuristic=lazy,
+        dominance=True,
+    )
+    path, cost, _, _ = solver.search()
+    assert cost == COSTS["maze"]
+    assert _replay(environment, path) == cost
+
+
+def test_maze_cost_without_dominance(environments):
+    environment = environments["maze"]
+    problem = PacmanProblem(environment, macros=True)
+    solver = AStar(problem, FoodTourHeuristic(environment), frontier="bucket", dominance=False)
+    assert solver.search()[1] == COSTS["maze"]
+
+
+@pytest.mark.parametrize("name", ["default", "small_basic"])
+def test_external_astar(environments, tmp_path, name):
+    environment = environments[name]
+    solver = ExternalAStar(
+        PacmanProblem(environment),
+        CombinedHeuristic(environment),
+        frontier="bucket",
+        closed_ram_bytes=64,  # tràn tập đóng ra đĩa gần như ngay lập tức
+        batch_size=8,
+        work_dir=str(tmp_path),
+    )
+    path, cost, _, _ = solver.search()
+    assert cost == COSTS[name]
+    assert _replay(environment, path) == cost
+
+
+@pytest.mark.parametrize("name", ["default", "small_basic"])
+def test_parallel_astar(environments, name):
+    environment = environments[name]
+    solver = ParallelAStar(PacmanProblem(environment), CombinedHeuristic(environment), workers=2, frontier="bucket")
+    path, cost, _, _ = solver.search()
+    assert cost == COSTS[name]
+    assert _replay(environment, path) == cost
+
+
+def test_resume_round_trip(environments, tmp_path):
+    environment = environments["maze"]
+    snapshot = tmp_path / "maze.ck"
+    checkpoint = Checkpointer(snapshot, every=50)
+    solver = AStar(
+        PacmanProblem(environment),
+        FoodTourHeuristic(environment),
+        frontier="bucket",
+        checkpoint=checkpoint,
+        dominance=True,
+    )
+    assert solver.search()[1] == COSTS["maze"]
+    assert checkpoint.saved > 0
+
+    _, _, counters = Checkpointer(snapshot).load()
+    resumed = AStar(
+        PacmanProblem(environment),
+        FoodTourHeuristic(environment),
+        frontier="bucket",
+        resume_from=str(snapshot),
+        dominance=True,
+    )
+    path, cost, expanded, _ = resumed.search()
+    assert cost == COSTS["maze"] and expanded >= counters["expanded"]
+    assert _replay(environment, path) == cost
+
+
+def _tables(environment: PacmanEnvironment):
+    tables = [bytes(table.matrix) for table in environment.timer_distances()]
+    tables.append(bytes(environment.distances(free=True).matrix))
+    if environment.layouts[0].ghost_starts:
+        tables.extend(bytes(environment.ghost_distances(free).table) for free in (False, True))
+    return tables
+
+
+@pytest.mark.parametrize("name", ["default", "small_basic"])
+def test_artifact_round_trip(environments, tmp_path, name):
+    lines = _layout(name)
+    reference = _tables(environments[name])
+
+    built = PacmanEnvironment.compiled(lines, str(tmp_path))
+    path = built.artifact_path
+    assert path is not None and os.path.exists(path)
+    loaded = PacmanEnvironment.compiled(lines, str(tmp_path))
+    assert loaded.artifact_path == path and loaded._segments
+    assert _tables(loaded) == reference
+    assert run_auto_mode(lines, cache_dir=str(tmp_path))[1] == COSTS[name]
+
+    # Ghi đè một byte trong vùng bảng: CRC không khớp nên artifact được dựng lại.
+    data = bytearray(Path(path).read_bytes())
+    data[-16] ^= 0xFF
+    Path(path).write_bytes(bytes(data))
+    assert PacmanEnvironment._load_artifact(path, str(tmp_path)) is None
+    rebuilt = PacmanEnvironment.compiled(lines, str(tmp_path))
+    assert _tables(rebuilt) == reference
+    assert PacmanEnvironment._load_artifact(path, str(tmp_path)) is not None
+
+
+def test_environment_without_cache_dir_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    environment = PacmanEnvironment(DEFAULT_LAYOUT)
+    environment.timer_distances()
+    assert run_auto_mode(DEFAULT_LAYOUT)[1] == COSTS["default"]
+    assert environment.cache_dir is None and not any(tmp_path.iterdir())
@@ -0,0 +1,323 @@
+"""Kiểm tra các thành phần tìm kiếm chung: frontier, `NodeStore`, trội, A* lười, checkpoint."""
+
+from __future__ import annotations
+
+import heapq
+import json
+from typing import Dict, List, Tuple
+
+import pytest
+
+from puzzle import Action, AStar, DominanceIndex, Frontier, Heuristic, HeapFrontier, Problem, make_frontier
+from puzzle.checkpoint import Checkpointer
+from puzzle.frontier import FRONTIERS
+from puzzle.instrumentation import SearchInstrumentation
+from puzzle.nodestore import NO_PARENT, NodeStore
+
+KINDS = ["heap", "bucket", "indexed-heap"]
+
+# Đồ thị có hướng nhỏ: đường rẻ nhất S -> A -> C -> G (chi phí 6), nhánh B hấp dẫn theo `h` thấp.
+GRAPH: Dict[str, List[Tuple[str, int]]] = {
+    "S": [("A", 1), ("B", 1)],
+    "A": [("C", 2)],
+    "B": [("C", 4), ("G", 8)],
+    "C": [("G", 3)],
+    "G": [],
+}
+TRUE_H = {"S": 6, "A": 5, "B": 7, "C": 3, "G": 0}
+
+
+class GraphProblem(Problem):
+    def __init__(self, graph=GRAPH, start="S", goal="G"):
+        super().__init__(start)
+        self.graph = graph
+        self.goal = goal
+
+    def is_goal(self, state) -> bool:
+        return state == self.goal
+
+    def get_successors(self, state):
+        return [(target, Action(f"{state}->{target}"), cost) for target, cost in self.graph[state]]
+
+
+class TableHeuristic(Heuristic):
+    def __init__(self, table=TRUE_H):
+        self.table = table
+
+    def calculate(self, state) -> int:
+        return self.table[state]
+
+
+class LazyTableHeuristic(TableHeuristic):
+    """Phần rẻ luôn bằng 0; `refine` trả giá trị thật."""
+
+    def calculate_lazy_batch(self, states):
+        return [0] * len(states)
+
+    def refine(self, state, h: int) -> int:
+        return self.table[state]
+
+
+class LeakyFrontier(Frontier):
+    """Heap thuần không loại bản đẩy cũ: mọi lần push đều được pop."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._heap: list = []
+        self._counter = 0
+
+    def push(self, key, item, f, tie=0) -> None:
+        self._counter += 1
+        heapq.heappush(self._heap, (f, tie, self._counter, key, item))
+
+    def pop(self):
+        entry = heapq.heappop(self._heap)
+        return entry[3], entry[4]
+
+    def get(self, key):
+        return next((entry[4] for entry in self._heap if entry[3] == key), None)
+
+    def peek_priority(self):
+        return self._heap[0][0] if self._heap else None
+
+    def items(self):
+        return ((entry[3], entry[4]) for entry in self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_frontier_orders_by_f_then_tie(kind):
+    frontier = make_frontier(kind)
+    frontier.push("a", 1, 5, 2)
+    frontier.push("b", 2, 3, 0)
+    frontier.push("c", 3, 5, 1)
+    assert frontier.peek_priority() == 3
+    assert [frontier.pop() for _ in range(3)] == [("b", 2), ("c", 3), ("a", 1)]
+    assert not frontier and frontier.peek_priority() is None
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_frontier_decrease_key(kind):
+    frontier = make_frontier(kind)
+    frontier.push("a", "old", 9)
+    frontier.push("b", "b", 4)
+    frontier.push("a", "new", 2)
+    assert frontier.get("a") == "new" and "a" in frontier
+    assert sorted(frontier.items()) == [("a", "new"), ("b", "b")]
+    assert frontier.pop() == ("a", "new")
+    assert frontier.pop() == ("b", "b")
+    assert not frontier
+
+
+def test_heap_drops_superseded_entry_when_key_is_item():
+    frontier = HeapFrontier()
+    frontier.push(5, 5, 1)
+    frontier.push(5, 5, 3)  # đẩy lại với f lớn hơn (A* lười sau `refine`)
+    frontier.push(6, 6, 2)
+    assert frontier.peek_priority() == 2
+    assert frontier.pop() == (6, 6)
+    assert frontier.pop() == (5, 5)
+    assert list(frontier.items()) == []
+    assert frontier.stale_popped == 1
+
+
+@pytest.mark.parametrize("f", [2.5, -1])
+def test_bucket_rejects_non_integral_priorities(f):
+    with pytest.raises(ValueError):
+        make_frontier("bucket").push("a", 1, f)
+
+
+def test_bucket_accepts_integral_floats():
+    frontier = make_frontier("bucket")
+    frontier.push("a", 1, 3.0)
+    assert frontier.peek_priority() == 3
+
+
+def test_bucket_drops_emptied_buckets():
+    frontier = make_frontier("bucket")
+    frontier.push("a", 1, 2)
+    frontier.push("b", 2, 5)
+    frontier.push("a", 1, 4)  # "a" rời bucket 2
+    assert frontier._buckets[2] is None and frontier._tie_heaps[2] is None
+    assert frontier.pop() == ("a", 1)
+    assert frontier._buckets[4] is None and frontier._tie_heaps[4] is None
+    frontier.push("c", 3, 2)
+    assert frontier.pop() == ("c", 3) and frontier.pop() == ("b", 2)
+    assert not any(frontier._buckets)
+
+
+def test_unknown_frontier():
+    with pytest.raises(ValueError):
+        make_frontier("fibonacci")
+
+
+def test_nodestore_columns_and_path():
+    store = NodeStore()
+    root = store.add("S", 0, 6)
+    a = store.add("A", 1, 5, root, "go-a")
+    c = store.add("C", 9, 3, a, "go-c")
+    assert store.get_id("C") == c and store.get_id("X") is None
+    store.update(c, 3, a, "go-c2")
+    assert store.g[c] == 3 and store.f(c) == 6
+    assert store.get_path(c) == ["go-a", "go-c2"]
+    assert store.parent[root] == NO_PARENT and len(store) == 3
+
+    store.set_h(c, 2**40)  # vượt int32: cột tự nâng lên 8 byte
+    assert store.h.typecode == "q" and store.h[c] == 2**40
+    store.update(a, 1.5, root, "go-a")
+    assert store.g.typecode == "d" and store.g[a] == 1.5
+
+
+class FuelProblem(Problem):
+    """Trạng thái (ô, nhiên liệu): cùng ô, nhiều nhiên liệu hơn thì trội."""
+
+    def __init__(self):
+        super().__init__((0, 0))
+
+    def is_goal(self, state) -> bool:
+        return False
+
+    def get_successors(self, state):
+        return []
+
+    def dominance_key(self, state):
+        return state[0]
+
+    def dominates(self, a, b) -> bool:
+        return a[0] == b[0] and a[1] >= b[1]
+
+
+def test_dominance_index():
+    store = NodeStore()
+    index = DominanceIndex(FuelProblem(), store)
+    index.add(store.add((1, 5), 2, 0))
+    assert index.dominated((1, 3), 3)
+    assert not index.dominated((1, 3), 1)  # g nhỏ hơn thì không bị bỏ
+    assert not index.dominated((1, 6), 5)
+    assert not index.dominated((2, 0), 9)  # nhóm khác
+    assert index.pruned == 1
+
+    stronger = store.add((1, 9), 1, 0)
+    index.add(stronger)
+    assert index._groups[1] == [stronger]  # nút bị trội rời khỏi nhóm
+
+
+class GreedyDominanceProblem(GraphProblem):
+    """Mọi trạng thái cùng một nhóm và trội lẫn nhau: bật trội thì cắt gần hết."""
+
+    def dominance_key(self, state):
+        return 0
+
+    def dominates(self, a, b) -> bool:
+        return True
+
+
+def test_dominance_is_opt_in():
+    solver = AStar(GreedyDominanceProblem(), TableHeuristic())
+    assert solver.search()[1] == 6 and "dominated" not in solver.stats
+
+    solver = AStar(GreedyDominanceProblem(), TableHeuristic(), dominance=True)
+    assert solver.search()[1] == -1 and solver.stats["dominated"] > 0
+
+
+@pytest.mark.parametrize("kind", KINDS)
+@pytest.mark.parametrize("tie_breaking", ["none", "low-h", "high-g", "lifo"])
+def test_astar_optimal_on_graph(kind, tie_breaking):
+    path, cost, _, _ = AStar(GraphProblem(), TableHeuristic(), frontier=kind, tie_breaking=tie_breaking).search()
+    assert cost == 6
+    assert [a.type for a in path] == ["S->A", "A->C", "C->G"]
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_lazy_heuristic_refines_and_stays_optimal(kind):
+    solver = AStar(GraphProblem(), LazyTableHeuristic(), frontier=kind, lazy_heuristic=True)
+    assert solver.search()[1] == 6
+    assert solver.stats["heuristic_refined"] > 0 and solver.stats["heuristic_repushed"] > 0
+
+
+# C được đẩy với f = 6 (qua A) rồi f = 2 (qua B); `refine` nâng h(C) lên 5 nên bản f = 6 đã cũ.
+REPUSH_GRAPH: Dict[str, List[Tuple[str, int]]] = {
+    "S": [("A", 1), ("B", 1)],
+    "A": [("C", 5)],
+    "B": [("C", 1)],
+    "C": [("G", 5)],
+    "G": [],
+}
+REPUSH_H = {"S": 0, "A": 0, "B": 0, "C": 5, "G": 0}
+
+
+@pytest.mark.parametrize("kind, superseded", [("heap", 0), ("leaky", 1)])
+def test_lazy_guard_skips_superseded_entries(monkeypatch, kind, superseded):
+    monkeypatch.setitem(FRONTIERS, "leaky", LeakyFrontier)
+    problem = GraphProblem(REPUSH_GRAPH)
+    solver = AStar(problem, LazyTableHeuristic(REPUSH_H), frontier=kind, lazy_heuristic=True)
+    path, cost, expanded, _ = solver.search()
+    assert cost == 7 and [a.type for a in path] == ["S->B", "B->C", "C->G"]
+    assert expanded == 4  # S, A, B, C mỗi nút đúng một lần
+    assert solver.stats["heuristic_superseded"] == superseded
+
+
+def test_instrumentation_json_has_no_infinity():
+    instrumentation = SearchInstrumentation(trace_memory=False)
+    instrumentation.record_heuristics(0, (float("inf"), 2))
+    instrumentation.record_heuristics(1, (3,))
+    text = instrumentation.to_json({"bound": float("inf"), "expanded": 2})
+    data = json.loads(text, parse_constant=lambda name: pytest.fail(name))
+    assert data["search"] == {"bound": None, "expanded": 2}
+    assert data["heuristic_by_depth"][0]["max"] is None and data["heuristic_by_depth"][0]["min"] == 2
+    assert data["heuristic_by_depth"][1]["mean"] == 3
+
+
+def _grid_problem(size: int = 6) -> GraphProblem:
+    graph: Dict[Tuple[int, int], List[Tuple[Tuple[int, int], int]]] = {}
+    for r in range(size):
+        for c in range(size):
+            graph[(r, c)] = [
+                ((r + dr, c + dc), 1 + (r * 7 + c * 3) % 3)
+                for dr, dc in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                if 0 <= r + dr < size and 0 <= c + dc < size
+            ]
+    return GraphProblem(graph, (0, 0), (size - 1, size - 1))
+
+
+def _replay(problem: GraphProblem, path: List[Action]) -> int:
+    """Đi lại `path` từ trạng thái đầu, trả tổng chi phí (đích phải đúng)."""
+    state, total = problem.initial_state, 0
+    for action in path:
+        state, cost = next((s, c) for s, a, c in problem.get_successors(state) if a == action)
+        total += cost
+    assert problem.is_goal(state)
+    return total
+
+
+class ZeroHeuristic(Heuristic):
+    def calculate(self, state) -> int:
+        return 0
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_checkpoint_resume_round_trip(tmp_path, kind):
+    problem = _grid_problem()
+    _, full_cost, full_expanded, _ = AStar(problem, ZeroHeuristic(), frontier=kind).search()
+
+    checkpoint = Checkpointer(tmp_path / "run.ck", every=5)
+    AStar(problem, ZeroHeuristic(), frontier=kind, checkpoint=checkpoint).search()
+    assert checkpoint.saved > 0
+
+    store, frontier_ids, counters = Checkpointer(tmp_path / "run.ck").load()
+    assert frontier_ids and 0 < counters["expanded"] <= full_expanded
+    assert len(store) >= counters["expanded"]
+
+    resumed = AStar(problem, ZeroHeuristic(), frontier=kind, resume_from=str(tmp_path / "run.ck"))
+    path, cost, expanded, _ = resumed.search()
+    assert cost == full_cost == _replay(problem, path)
+    assert expanded >= counters["expanded"]
+
+
+def test_checkpoint_rejects_foreign_file(tmp_path):
+    path = tmp_path / "not-a-checkpoint"
+    path.write_bytes(b"hello\n")
+    with pytest.raises(ValueError):
+        Checkpointer(path).load()
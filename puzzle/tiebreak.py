@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Union
+
+from .frontier import Tie
+
+TieBreaker = Callable[[object, int, int, int], Tie]
+TieKey = Callable[[object, int, int], Tie]
+
+
+def _no_tie(state: object, g: int, h: int, seq: int) -> Tie:
+    return 0
+
+
+def _low_h(state: object, g: int, h: int, seq: int) -> Tie:
+    return h
+
+
+def _high_g(state: object, g: int, h: int, seq: int) -> Tie:
+    return -g
+
+
+def _lifo(state: object, g: int, h: int, seq: int) -> Tie:
+    return -seq
+
+
+TIE_BREAKERS: Dict[str, TieBreaker] = {
+    "none": _no_tie,
+    "low-h": _low_h,
+    "high-g": _high_g,
+    "lifo": _lifo,
+}
+
+
+def make_tie_breaker(policy: Union[str, TieKey] = "none") -> TieBreaker:
+    """Hàm tính khoá phụ `tie` cho các nút cùng `f`.
+
+    `policy` là tên chính sách (`none`, `low-h`, `high-g`, `lifo`) hoặc một
+    hàm `key(state, g, h)` trả về số nguyên/tuple (nhỏ hơn được pop trước).
+    Khoá luôn là số nguyên hoặc tuple nên frontier so sánh trong C.
+    """
+    if callable(policy):
+        return lambda state, g, h, seq: policy(state, g, h)
+    breaker = TIE_BREAKERS.get(policy.lower())
+    if breaker is None:
+        raise ValueError(f"Chính sách tie-break '{policy}' không được hỗ trợ.")
+    return breaker
+
+
+__all__ = ["TIE_BREAKERS", "make_tie_breaker"]